@@ -1,27 +1,36 @@
 # gemini_summarizer.py
 import os
+import json
+import re
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
-import google.generativeai as genai
+from typing import TypedDict
+
+from llm_cache import get_cache, make_key
+from rate_limit import TokenBucket, backoff_delay
 
 # -------------------------
-# LOAD API KEY (ENV → FILE)
+# API KEY (ENV → FILE)
 # -------------------------
 KEY_FILE = Path(__file__).parent / "config" / "gemini_key.txt"
 
-# First try environment variable (for GitHub Actions / CI)
-API_KEY = os.getenv("GEMINI_API_KEY")
-
-# Fallback: local file (for your laptop)
-if not API_KEY and KEY_FILE.exists():
-    API_KEY = KEY_FILE.read_text(encoding="utf-8").strip()
 
-if not API_KEY:
-    raise RuntimeError(
-        "GEMINI API key not found. Set GEMINI_API_KEY env var or create config/gemini_key.txt"
-    )
+def _load_api_key() -> str:
+    # First try environment variable (for GitHub Actions / CI)
+    api_key = os.getenv("GEMINI_API_KEY")
 
-genai.configure(api_key=API_KEY)
+    # Fallback: local file (for your laptop)
+    if not api_key and KEY_FILE.exists():
+        api_key = KEY_FILE.read_text(encoding="utf-8").strip()
 
+    if not api_key:
+        raise RuntimeError(
+            "GEMINI API key not found. Set GEMINI_API_KEY env var or create config/gemini_key.txt"
+        )
+    return api_key
 
 
 # -------------------------
@@ -39,26 +48,345 @@ Rules:
 
 MODEL_NAME = "models/gemini-2.5-flash"
 
-model = genai.GenerativeModel(
-    MODEL_NAME,
-    system_instruction=SYSTEM_PROMPT,
-)
+# Built on first use, so importing this module needs neither the SDK import
+# nor an API key. set_model() swaps in any object with generate_content().
+_model = None
+_model_lock = threading.Lock()
+
+
+def set_model(model):
+    """Inject a model (e.g. a local fake); None restores lazy construction."""
+    global _model
+    with _model_lock:
+        _model = model
+
+
+def get_model():
+    global _model
+    if _model is not None:
+        return _model
+
+    with _model_lock:
+        if _model is None:
+            import google.generativeai as genai
+
+            genai.configure(api_key=_load_api_key())
+            _model = genai.GenerativeModel(
+                MODEL_NAME,
+                system_instruction=SYSTEM_PROMPT,
+            )
+        return _model
+
+
+# -------------------------
+# RATE LIMITING
+# -------------------------
+# Defaults match the gemini-2.5-flash free tier; raise them for paid quotas.
+GEMINI_RPM = float(os.getenv("GEMINI_RPM", "10"))
+GEMINI_TPM = float(os.getenv("GEMINI_TPM", "250000"))
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "5"))
+
+# Rough allowance for the reply when reserving TPM budget up front.
+_EXPECTED_OUTPUT_TOKENS = 300
+
+_request_bucket = TokenBucket(GEMINI_RPM)
+_token_bucket = TokenBucket(GEMINI_TPM)
+
+
+# Set once a 429 outlasts every retry: the quota is gone for this run, so
+# later calls fail fast instead of each sitting through the whole backoff.
+_quota_exhausted = threading.Event()
+
+
+def quota_exhausted() -> bool:
+    """True once Gemini's quota ran out in this process."""
+    return _quota_exhausted.is_set()
+
+
+def _is_rate_limited(exc: Exception) -> bool:
+    # google.api_core's ResourceExhausted carries code 429; checking the code
+    # avoids importing api_core here and lets fakes signal quota errors too.
+    return getattr(exc, "code", None) == 429
+
+
+def _estimate_tokens(text: str) -> int:
+    # ~3 chars/token is conservative for mixed Bangla/English text.
+    return len(text) // 3 + 1
+
+
+# -------------------------
+# TOKEN BUDGETING
+# -------------------------
+# Max tokens of article body put into a prompt (0 = leave the body out).
+GEMINI_BODY_TOKENS = int(os.getenv("GEMINI_BODY_TOKENS", "1200"))
+# Ask the model's count_tokens instead of the local estimate (one extra RPC
+# per body, memoized and paced by the RPM bucket).
+GEMINI_COUNT_TOKENS = os.getenv("GEMINI_COUNT_TOKENS", "0") == "1"
+
+# Bengali dari (।) plus ?, ! and full stop end a sentence.
+_SENTENCE_END = re.compile(r"(?<=[।?!.])\s+")
+
+
+@lru_cache(maxsize=1024)
+def count_tokens(text: str) -> int:
+    """Token count of `text`: the model's own count if enabled, else an estimate."""
+    if GEMINI_COUNT_TOKENS and not _quota_exhausted.is_set():
+        try:
+            model = get_model()
+            _request_bucket.acquire()
+            return model.count_tokens(text).total_tokens
+        except Exception:
+            pass
+    return _estimate_tokens(text)
+
+
+def trim_to_tokens(text: str, budget: int = GEMINI_BODY_TOKENS) -> str:
+    """
+    Leading whole sentences of `text` that fit in `budget` tokens.
+
+    Cuts at । ? ! or . so the model never sees half a sentence; a first
+    sentence that alone is over budget is cut by characters instead. The
+    whole text is counted once with count_tokens and each sentence's local
+    estimate is scaled to that count, so the budget is enforced in the same
+    units without one model call per sentence.
+    """
+    text = (text or "").strip()
+    if budget <= 0 or not text:
+        return ""
+    total = count_tokens(text)
+    if total <= budget:
+        return text
+
+    scale = total / _estimate_tokens(text)
+    kept = []
+    used = 0.0
+    for sentence in _SENTENCE_END.split(text):
+        cost = _estimate_tokens(sentence) * scale
+        if used + cost > budget:
+            break
+        kept.append(sentence)
+        used += cost
+
+    if not kept:
+        return text[:int(len(text) * budget / total)]
+    return " ".join(kept)
+
+
+# Input/output tokens of the calls made inside track_usage(), per thread.
+_usage = threading.local()
+
+
+@contextmanager
+def track_usage():
+    """
+    Collect Gemini token usage for the calls made in this block (this thread).
+
+    Yields a dict {"input_tokens", "output_tokens", "calls"}; cached replies
+    cost nothing and are not counted.
+    """
+    totals = {"input_tokens": 0, "output_tokens": 0, "calls": 0}
+    previous = getattr(_usage, "totals", None)
+    _usage.totals = totals
+    try:
+        yield totals
+    finally:
+        _usage.totals = previous
+
+
+def _record_usage(response, prompt_tokens_estimate: int):
+    totals = getattr(_usage, "totals", None)
+    if totals is None:
+        return
+    meta = getattr(response, "usage_metadata", None)
+    totals["input_tokens"] += getattr(meta, "prompt_token_count", None) or prompt_tokens_estimate
+    totals["output_tokens"] += getattr(meta, "candidates_token_count", None) or 0
+    totals["calls"] += 1
 
 
 # -------------------------
 # HELPER
 # -------------------------
-def _ask_gemini(prompt: str) -> str:
-    response = model.generate_content(prompt)
+class BadReply(ValueError):
+    """Gemini answered, but not with usable content (as opposed to quota / network errors)."""
+
+
+class QuotaExhausted(RuntimeError):
+    """Gemini's quota ran out earlier in this run; the call was not made."""
+
+
+def _ask_gemini(prompt: str, generation_config=None, expected_output_tokens=_EXPECTED_OUTPUT_TOKENS,
+                validate=None) -> str:
+    """
+    One generate_content call, paced by the RPM/TPM buckets and retried with
+    exponential backoff when Gemini answers 429 (ResourceExhausted). A 429
+    that survives every retry trips quota_exhausted(), after which all
+    uncached calls raise QuotaExhausted at once.
+
+    Replies are cached by a hash of model, system prompt, prompt and
+    generation config, so an identical prompt never pays for a second call.
+    `validate(text) -> bool` decides whether a reply is good enough to keep:
+    a rejected reply is still returned but never cached, and a cached one
+    it rejects is ignored, so a bad answer isn't replayed for the whole TTL.
+    """
+    cache = get_cache()
+    cache_key = make_key(MODEL_NAME, SYSTEM_PROMPT, prompt, generation_config)
+    if cache is not None:
+        cached = cache.get(cache_key)
+        if cached is not None and (validate is None or validate(cached)):
+            return cached
+
+    # Resolve the model before taking rate tokens: with no API key this
+    # raises at once instead of waiting out the RPM budget on every call.
+    model = get_model()
+
+    prompt_tokens = _estimate_tokens(SYSTEM_PROMPT + prompt)
+    tokens = prompt_tokens + expected_output_tokens
+
+    for attempt in range(GEMINI_MAX_RETRIES + 1):
+        if _quota_exhausted.is_set():
+            raise QuotaExhausted("Gemini quota exhausted earlier in this run")
+        _request_bucket.acquire()
+        _token_bucket.acquire(tokens)
+        try:
+            response = model.generate_content(prompt, generation_config=generation_config)
+            break
+        except Exception as e:
+            if not _is_rate_limited(e):
+                raise
+            if attempt == GEMINI_MAX_RETRIES:
+                _quota_exhausted.set()
+                raise
+            time.sleep(backoff_delay(attempt))
+
+    _record_usage(response, prompt_tokens)
     if not response or not getattr(response, "text", None):
-        raise RuntimeError("Empty Gemini response")
-    return response.text.strip()
+        raise BadReply("Empty Gemini response")
+
+    text = response.text.strip()
+    if cache is not None and (validate is None or validate(text)):
+        cache.put(cache_key, text)
+    return text
+
+
+def _finish_one_liner(text: str) -> str:
+    return text.strip()[:140]
+
+
+def _finish_telegram(body: str, source: str, url: str) -> str:
+    body = body.strip()
+    lines = [body]
+
+    # Ensure source line is present
+    if source and source not in body and f"সূত্র: {source}" not in body:
+        lines.append(f"সূত্র: {source}")
+
+    # Ensure URL is present
+    if url and url not in body:
+        lines.append(url)
+
+    return "\n".join(lines)
 
 
 # -------------------------
 # PUBLIC API
 # -------------------------
-def summarize_one_liner(title: str, summary: str) -> str:
+class _Captions(TypedDict):
+    summary: str
+    telegram: str
+    instagram: str
+
+
+def _parse_captions(raw: str) -> dict:
+    """Structured reply -> {key: text} for the keys holding a non-empty string."""
+    try:
+        data = json.loads(raw)
+    except ValueError as e:
+        raise BadReply(f"Gemini reply is not JSON: {e}") from e
+    if not isinstance(data, dict):
+        raise BadReply("Gemini JSON reply is not an object")
+    return {
+        key: data[key]
+        for key in ("summary", "telegram", "instagram")
+        if isinstance(data.get(key), str) and data[key].strip()
+    }
+
+
+def _captions_complete(raw: str) -> bool:
+    try:
+        return len(_parse_captions(raw)) == 3
+    except BadReply:
+        return False
+
+
+def _article_section(full_text: str) -> str:
+    body = trim_to_tokens(full_text)
+    return f"Article (excerpt):\n{body}\n" if body else ""
+
+
+def generate_all(title: str, summary: str, source: str, url: str, full_text: str = "") -> dict:
+    """
+    One structured Gemini call producing all three outputs.
+
+    Returns {"summary", "caption_telegram", "caption_instagram"} with the same
+    post-processing as summarize_one_liner / telegram_caption /
+    instagram_caption. `full_text` is trimmed to GEMINI_BODY_TOKENS on
+    sentence boundaries before it goes into the prompt.
+
+    Fields the reply leaves empty are simply missing from the result (an
+    incomplete reply is not cached); BadReply if it is not a JSON object at
+    all. Quota / network errors propagate unchanged.
+    """
+    prompt = f"""
+Write three pieces of copy for this Tollywood entertainment news and return them as JSON.
+
+"summary": ONE punchy line (max 120 characters). No emojis.
+
+"telegram": a Telegram caption.
+- 2–3 short lines
+- Headline style first line
+- Max 2 emojis
+- Include a CTA line like: "পুরো খবর পড়ুন নিচের লিঙ্কে:"
+- Do NOT shorten or change the URL.
+- You don't need to mention the source or URL yourself; that will be added separately.
+
+"instagram": an Instagram caption.
+- Friendly, natural tone
+- 3–6 emojis
+- 3–6 short lines
+- Mention source casually
+- End with 5–7 relevant hashtags
+
+No invented information in any of them.
+
+---NEWS---
+Title: {title}
+Summary: {summary}
+{_article_section(full_text)}Source: {source}
+Link: {url}
+"""
+    config = {
+        "response_mime_type": "application/json",
+        "response_schema": _Captions,
+    }
+    raw = _ask_gemini(
+        prompt,
+        config,
+        expected_output_tokens=3 * _EXPECTED_OUTPUT_TOKENS,
+        validate=_captions_complete,
+    )
+    data = _parse_captions(raw)
+
+    outputs = {}
+    if "summary" in data:
+        outputs["summary"] = _finish_one_liner(data["summary"])
+    if "telegram" in data:
+        outputs["caption_telegram"] = _finish_telegram(data["telegram"], source, url)
+    if "instagram" in data:
+        outputs["caption_instagram"] = data["instagram"].strip()
+    return outputs
+
+
+def summarize_one_liner(title: str, summary: str, full_text: str = "") -> str:
     prompt = f"""
 Summarize this entertainment news into ONE punchy line (max 120 characters).
 No emojis.
@@ -66,11 +394,11 @@ No emojis.
 ---NEWS---
 Title: {title}
 Summary: {summary}
-"""
-    return _ask_gemini(prompt)[:140]
+{_article_section(full_text)}"""
+    return _finish_one_liner(_ask_gemini(prompt))
 
 
-def telegram_caption(title: str, summary: str, source: str, url: str) -> str:
+def telegram_caption(title: str, summary: str, source: str, url: str, full_text: str = "") -> str:
     prompt = f"""
 Write a Telegram caption for this Tollywood news.
 
@@ -86,24 +414,13 @@ Rules:
 ---NEWS---
 Title: {title}
 Summary: {summary}
-Source: {source}
+{_article_section(full_text)}Source: {source}
 Link: {url}
 """
-    body = _ask_gemini(prompt).strip()
-
-    lines = [body]
-
-    # Ensure source line is present
-    if source and source not in body and f"সূত্র: {source}" not in body:
-        lines.append(f"সূত্র: {source}")
+    return _finish_telegram(_ask_gemini(prompt), source, url)
 
-    # Ensure URL is present
-    if url and url not in body:
-        lines.append(url)
-
-    return "\n".join(lines)
 
-def instagram_caption(title: str, summary: str, source: str) -> str:
+def instagram_caption(title: str, summary: str, source: str, full_text: str = "") -> str:
     prompt = f"""
 Write an Instagram caption for a Tollywood entertainment post.
 
@@ -117,6 +434,6 @@ Rules:
 ---NEWS---
 Title: {title}
 Summary: {summary}
-Source: {source}
+{_article_section(full_text)}Source: {source}
 """
     return _ask_gemini(prompt)
@@ -0,0 +1,49 @@
+# html_parse.py
+import os
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+# -------------------------
+# PARSER SELECTION
+# -------------------------
+# lxml is several times faster than the pure-Python html.parser; use it when
+# installed. HTML_PARSER=html.parser forces the old backend.
+try:
+    import lxml  # noqa: F401
+    _DEFAULT_PARSER = "lxml"
+except ImportError:
+    _DEFAULT_PARSER = "html.parser"
+
+PARSER = os.getenv("HTML_PARSER", _DEFAULT_PARSER)
+
+
+def _has_class(css_class: str):
+    # A plain string only matches the *whole* class attribute on recent bs4
+    # ("col-md-4" would miss class="col-md-4 mb-3"), so match by token.
+    return lambda value: value is not None and css_class in value.split()
+
+
+def strainer(name=None, class_: str = None, **attrs) -> SoupStrainer:
+    """
+    Only build subtrees rooted at matching tags, e.g.
+    strainer("div", class_="col-md-4") or strainer(attrs={"data-test-id": "story-card"}).
+    """
+    if class_ is not None:
+        attrs["class_"] = _has_class(class_)
+    return SoupStrainer(name, **attrs)
+
+
+def make_soup(page, parse_only: SoupStrainer = None) -> BeautifulSoup:
+    """
+    Parse a fetched page (anything with .content bytes and .charset).
+
+    We hand BeautifulSoup the raw bytes so the charset comes from the HTTP
+    header when the server declared one, and otherwise from the document's
+    own <meta charset>, instead of requests' ISO-8859-1 guess.
+    """
+    return BeautifulSoup(
+        page.content,
+        PARSER,
+        parse_only=parse_only,
+        from_encoding=getattr(page, "charset", None),
+    )
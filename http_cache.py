@@ -0,0 +1,261 @@
+# http_cache.py
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from http_session import fetch
+
+# -------------------------
+# Tunables (ENV overridable)
+# -------------------------
+CACHE_DIR = Path(os.getenv("FEED_POSTER_CACHE_DIR", ".cache")) / "http"
+MAX_BYTES = int(float(os.getenv("HTTP_CACHE_MAX_MB", "200")) * 1024 * 1024)
+TTL_SECONDS = float(os.getenv("HTTP_CACHE_TTL_HOURS", "72")) * 3600
+ENABLED = os.getenv("HTTP_CACHE", "1") != "0"
+
+
+def _declared_charset(content_type: str):
+    """charset=... from a Content-Type header, or None if the server didn't say."""
+    for param in (content_type or "").split(";")[1:]:
+        key, _, value = param.partition("=")
+        if key.strip().lower() == "charset" and value.strip():
+            return value.strip().strip('"\'')
+    return None
+
+
+def code_version(*paths) -> str:
+    """
+    Short hash of source files, for tagging stored scraper output: any edit to
+    the parsing code changes it, so stale output is never served.
+    """
+    digest = hashlib.sha1()
+    for path in paths:
+        digest.update(Path(path).read_bytes())
+    return digest.hexdigest()[:12]
+
+
+def _write_atomic(path: Path, data: bytes):
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+class CachedPage:
+    """
+    A fetched page. `parsed` is only set when the server answered 304 and a
+    previous run stored the scraper's output for this exact body, produced by
+    the same parser `version`, so callers can skip parsing altogether.
+    """
+
+    def __init__(self, cache, url, content: bytes, encoding: str, not_modified=False, parsed=None,
+                 charset=None, version=None):
+        self._cache = cache
+        self.url = url
+        self.content = content
+        self.encoding = encoding
+        self.charset = charset
+        self.not_modified = not_modified
+        self.parsed = parsed
+        self.version = version
+
+    @property
+    def text(self) -> str:
+        return str(self.content, self.encoding or "utf-8", errors="replace")
+
+    def store_parsed(self, value):
+        """Remember the scraper's output for this body; returns `value`."""
+        if self._cache is not None:
+            self._cache.store_parsed(self.url, value, self.version)
+        return value
+
+
+class HttpCache:
+    """
+    On-disk conditional-GET cache.
+
+    Bodies live in <dir>/<sha1(url)>.body, the scraper output for that body in
+    <dir>/<sha1(url)>.parsed.json (tagged with the parser version that made
+    it), and validators + bookkeeping in index.json.
+    Entries older than the TTL are dropped, then least-recently-used ones until
+    the total body size fits in `max_bytes`.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int = MAX_BYTES, ttl: float = TTL_SECONDS):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._dirty = False
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._index_path = self.directory / "index.json"
+        try:
+            self._index = json.loads(self._index_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self._index = {}
+
+    # ---- paths ----
+
+    def _body_path(self, entry) -> Path:
+        return self.directory / f"{entry['key']}.body"
+
+    def _parsed_path(self, entry) -> Path:
+        return self.directory / f"{entry['key']}.parsed.json"
+
+    # ---- public API ----
+
+    def fetch(self, url: str, version=None) -> CachedPage:
+        with self._lock:
+            entry = self._index.get(url)
+            if entry and time.time() - entry["stored_at"] > self.ttl:
+                self._drop(url)
+                entry = None
+            entry = dict(entry) if entry else None
+
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        resp = fetch(url, headers=headers)
+
+        if resp.status_code == 304 and entry:
+            try:
+                content = self._body_path(entry).read_bytes()
+            except OSError:
+                # Body vanished behind our back: refetch unconditionally.
+                with self._lock:
+                    self._drop(url)
+                return self.fetch(url, version)
+
+            parsed = None
+            try:
+                stored = json.loads(self._parsed_path(entry).read_text(encoding="utf-8"))
+                # Output of other (older) scraper code is ignored, not trusted.
+                if isinstance(stored, dict) and stored.get("version") == version:
+                    parsed = stored.get("value")
+            except (OSError, ValueError):
+                pass
+
+            with self._lock:
+                if url in self._index:
+                    self._index[url]["last_access"] = time.time()
+                    self._dirty = True
+            return CachedPage(self, url, content, entry.get("encoding"), True, parsed,
+                              charset=entry.get("charset"), version=version)
+
+        encoding = resp.encoding or resp.apparent_encoding
+        charset = _declared_charset(resp.headers.get("Content-Type"))
+        etag = resp.headers.get("ETag")
+        last_modified = resp.headers.get("Last-Modified")
+        page = CachedPage(self, url, resp.content, encoding, charset=charset, version=version)
+
+        if not (etag or last_modified):
+            # Nothing to revalidate with; don't bother storing it.
+            return page
+
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        new_entry = {
+            "key": key,
+            "etag": etag,
+            "last_modified": last_modified,
+            "encoding": encoding,
+            "charset": charset,
+            "size": len(resp.content),
+            "stored_at": time.time(),
+            "last_access": time.time(),
+        }
+        with self._lock:
+            self._parsed_path(new_entry).unlink(missing_ok=True)
+            _write_atomic(self._body_path(new_entry), resp.content)
+            self._index[url] = new_entry
+            self._dirty = True
+
+        return page
+
+    def store_parsed(self, url: str, value, version=None):
+        with self._lock:
+            entry = self._index.get(url)
+            if not entry:
+                return
+            data = json.dumps({"version": version, "value": value}, ensure_ascii=False).encode("utf-8")
+            _write_atomic(self._parsed_path(entry), data)
+
+    def flush(self):
+        """Evict expired / over-budget entries and persist the index."""
+        with self._lock:
+            self._evict()
+            if not self._dirty:
+                return
+            data = json.dumps(self._index).encode("utf-8")
+            _write_atomic(self._index_path, data)
+            self._dirty = False
+
+    # ---- internals (call with lock held) ----
+
+    def _drop(self, url: str):
+        entry = self._index.pop(url, None)
+        if entry:
+            self._body_path(entry).unlink(missing_ok=True)
+            self._parsed_path(entry).unlink(missing_ok=True)
+            self._dirty = True
+
+    def _evict(self):
+        now = time.time()
+        for url in [u for u, e in self._index.items() if now - e["stored_at"] > self.ttl]:
+            self._drop(url)
+
+        total = sum(e["size"] for e in self._index.values())
+        if total <= self.max_bytes:
+            return
+
+        for url in sorted(self._index, key=lambda u: self._index[u]["last_access"]):
+            total -= self._index[url]["size"]
+            self._drop(url)
+            if total <= self.max_bytes:
+                break
+
+
+# -------------------------
+# Module-level default cache
+# -------------------------
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    if not ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = HttpCache(CACHE_DIR)
+            atexit.register(_cache.flush)
+        return _cache
+
+
+def fetch_page(url: str, version=None) -> CachedPage:
+    """
+    GET `url`, revalidating against the on-disk cache when possible.
+
+    `version` identifies the parsing code (see code_version); stored output
+    is only handed back as `page.parsed` when it was made by that version.
+    """
+    cache = get_cache()
+    if cache is None:
+        resp = fetch(url)
+        return CachedPage(None, url, resp.content, resp.encoding or resp.apparent_encoding,
+                          charset=_declared_charset(resp.headers.get("Content-Type")))
+    return cache.fetch(url, version)
+
+
+def flush_cache():
+    if _cache is not None:
+        _cache.flush()
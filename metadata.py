@@ -0,0 +1,97 @@
+# metadata.py
+import json
+import re
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from html_parse import PARSER
+
+_HEAD_END = re.compile(rb"</head\s*>", re.I)
+_HEAD_TAGS = SoupStrainer(["meta", "script", "title"])
+
+_ARTICLE_TYPES = {"NewsArticle", "Article", "ReportageNewsArticle", "BlogPosting"}
+
+
+def _clean(value):
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    return None
+
+
+def _first(value):
+    return value[0] if isinstance(value, list) and value else value
+
+
+def _ld_name(value):
+    """JSON-LD author/image values come as str, {"name"/"url": ...} or lists of those."""
+    value = _first(value)
+    if isinstance(value, dict):
+        value = value.get("name") or value.get("url")
+    return _clean(value)
+
+
+def _ld_articles(soup):
+    for script in soup.find_all("script", attrs={"type": "application/ld+json"}):
+        try:
+            data = json.loads(script.string or "")
+        except ValueError:
+            continue
+
+        if isinstance(data, dict) and "@graph" in data:
+            data = data["@graph"]
+        for obj in data if isinstance(data, list) else [data]:
+            if not isinstance(obj, dict):
+                continue
+            types = obj.get("@type")
+            types = set(types) if isinstance(types, list) else {types}
+            if types & _ARTICLE_TYPES:
+                yield obj
+
+
+def _meta(soup, **attrs):
+    tag = soup.find("meta", attrs=attrs)
+    return _clean(tag.get("content")) if tag else None
+
+
+def extract_head_metadata(page) -> dict:
+    """
+    Article metadata from a fetched page's <head> only.
+
+    Parses just the bytes up to </head> (meta/script/title tags), preferring
+    a JSON-LD NewsArticle and then OpenGraph / article:* meta tags. Returns
+    {"title", "image", "author", "date"}; fields the page
+    doesn't declare are None so callers can fall back to body selectors.
+    """
+    match = _HEAD_END.search(page.content)
+    head = page.content[:match.end()] if match else page.content
+    soup = BeautifulSoup(
+        head,
+        PARSER,
+        parse_only=_HEAD_TAGS,
+        from_encoding=getattr(page, "charset", None),
+    )
+
+    result = dict.fromkeys(["title", "image", "author", "date"])
+
+    for obj in _ld_articles(soup):
+        result["title"] = result["title"] or _clean(obj.get("headline"))
+        result["image"] = result["image"] or _ld_name(obj.get("image"))
+        result["author"] = result["author"] or _ld_name(obj.get("author"))
+        result["date"] = result["date"] or _clean(obj.get("datePublished"))
+
+    result["title"] = result["title"] or _meta(soup, property="og:title")
+    result["image"] = result["image"] or _meta(soup, property="og:image")
+    result["date"] = result["date"] or _meta(soup, property="article:published_time")
+
+    if not result["author"]:
+        author = _meta(soup, name="author") or _meta(soup, property="article:author")
+        # WordPress often puts the author's profile URL here, not a name.
+        if author and not author.startswith(("http://", "https://")):
+            result["author"] = author
+
+    if result["image"]:
+        result["image"] = urljoin(page.url, result["image"])
+
+    return result
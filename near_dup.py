@@ -0,0 +1,168 @@
+# near_dup.py
+import hashlib
+import json
+import os
+import re
+import struct
+import time
+from pathlib import Path
+
+# -------------------------
+# Tunables (ENV overridable)
+# -------------------------
+INDEX_PATH = Path(os.getenv("FEED_POSTER_CACHE_DIR", ".cache")) / "near_dup_index.json"
+# A false positive silently drops a story (duplicates are never processed),
+# so titles alone don't decide: templated headlines ("Box office: X crosses
+# N crore", "... collection day 5" vs "day 6") score up to 0.92 across
+# different stories. Calibrated on the labelled pairs in test_near_dup.py:
+# same-story pairs score 0.13-0.92 on titles and 0.38-0.78 on bodies,
+# different stories up to 0.92 on titles but at most 0.38 on bodies. With
+# both bodies known, the bodies must overlap this much (0.12 above the worst
+# different-story pair, about 2.7 standard errors at 128 permutations) and
+# the titles at least be related. The one heavily rewritten same-story pair
+# (0.13 / 0.38) is missed on purpose: that only costs a second post.
+BODY_THRESHOLD = float(os.getenv("NEAR_DUP_BODY_THRESHOLD", "0.5"))
+TITLE_MIN = float(os.getenv("NEAR_DUP_TITLE_MIN", "0.25"))
+# Without a body on either side, only an essentially identical title counts.
+THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.95"))
+# How long a story stays in the index as a possible representative.
+WINDOW_SECONDS = float(os.getenv("NEAR_DUP_WINDOW_HOURS", "72")) * 3600
+
+# MinHash / LSH shape over title signatures: 64 bands x 2 rows makes any
+# pair above ~TITLE_MIN a candidate; candidates are then scored exactly.
+NUM_PERM = 128
+BANDS = 64
+ROWS = NUM_PERM // BANDS
+
+# Char n-grams taken inside each word, so reordered headlines still match.
+SHINGLE_SIZE = 3
+# Leading chars of full_text used for the body signature.
+BODY_CHARS = 1000
+
+_MERSENNE = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def _permutations():
+    # Fixed, derived coefficients so signatures are comparable across runs.
+    perms = []
+    for i in range(NUM_PERM):
+        digest = hashlib.sha256(f"minhash-{i}".encode()).digest()
+        a, b = struct.unpack("<QQ", digest[:16])
+        perms.append((a % (_MERSENNE - 1) + 1, b % _MERSENNE))
+    return perms
+
+
+_PERMS = _permutations()
+_NON_WORD = re.compile("[^\\w\u0980-\u09FF]+")
+
+
+def _normalize(text: str) -> str:
+    return _NON_WORD.sub(" ", (text or "").lower()).strip()
+
+
+def _shingles(text: str):
+    shingles = set()
+    for word in text.split():
+        if len(word) <= SHINGLE_SIZE:
+            shingles.add(word)
+        else:
+            shingles.update(word[i:i + SHINGLE_SIZE] for i in range(len(word) - SHINGLE_SIZE + 1))
+    return shingles
+
+
+def _minhash(text: str) -> list:
+    hashes = [
+        struct.unpack("<Q", hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest())[0]
+        for s in _shingles(_normalize(text))
+    ]
+    if not hashes:
+        return []
+    return [min(((a * h + b) % _MERSENNE) & _MAX_HASH for h in hashes) for a, b in _PERMS]
+
+
+def signature(title: str, full_text: str = "") -> dict:
+    """Separate MinHash signatures of the title and of the body lead."""
+    return {
+        "title": _minhash(title),
+        "body": _minhash((full_text or "")[:BODY_CHARS]),
+    }
+
+
+def similarity(sig_a: list, sig_b: list) -> float:
+    if not sig_a or not sig_b or len(sig_a) != len(sig_b):
+        return 0.0
+    return sum(x == y for x, y in zip(sig_a, sig_b)) / len(sig_a)
+
+
+def is_near_duplicate(sig_a: dict, sig_b: dict) -> bool:
+    title = similarity(sig_a["title"], sig_b["title"])
+    if sig_a["body"] and sig_b["body"]:
+        return title >= TITLE_MIN and similarity(sig_a["body"], sig_b["body"]) >= BODY_THRESHOLD
+    return title >= THRESHOLD
+
+
+def _band_keys(sig: list):
+    return [f"{i}:{hash(tuple(sig[i * ROWS:(i + 1) * ROWS]))}" for i in range(BANDS)]
+
+
+class NearDupIndex:
+    """
+    LSH index of recent stories' title signatures, persisted as JSON.
+
+    find() returns the uid of an already-indexed story that is a near
+    duplicate (same story from another site, or a retitled repost), and
+    add() registers a new representative.
+    """
+
+    def __init__(self, path: Path = INDEX_PATH, window: float = WINDOW_SECONDS):
+        self.path = Path(path)
+        self.window = window
+        self._entries = {}
+        self._buckets = {}
+
+        try:
+            entries = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            entries = {}
+
+        cutoff = time.time() - self.window
+        for uid, entry in entries.items():
+            # Entries from an older signature layout are simply dropped.
+            if entry.get("ts", 0) >= cutoff and len(entry.get("title", [])) == NUM_PERM:
+                self._insert(uid, entry)
+
+    def _insert(self, uid, entry):
+        self._entries[uid] = entry
+        for key in _band_keys(entry["title"]):
+            self._buckets.setdefault(key, set()).add(uid)
+
+    def find(self, uid: str, sig: dict):
+        """uid of the indexed story with the most similar title that is a near duplicate, or None."""
+        if not sig["title"]:
+            return None
+
+        candidates = set()
+        for key in _band_keys(sig["title"]):
+            candidates |= self._buckets.get(key, set())
+        candidates.discard(uid)
+
+        best, best_score = None, -1.0
+        for other in candidates:
+            entry = self._entries[other]
+            if not is_near_duplicate(sig, entry):
+                continue
+            score = similarity(sig["title"], entry["title"])
+            if score > best_score:
+                best, best_score = other, score
+        return best
+
+    def add(self, uid: str, sig: dict):
+        if sig["title"] and uid not in self._entries:
+            self._insert(uid, {"title": sig["title"], "body": sig["body"], "ts": time.time()})
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(self._entries), encoding="utf-8")
+        os.replace(tmp, self.path)
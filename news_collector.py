@@ -3,23 +3,26 @@
 import os
 import json
 import hashlib
+import queue
+import threading
+import time
 from pathlib import Path
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from urllib.parse import urlparse
 
-import pandas as pd
+from google.api_core.exceptions import AlreadyExists
 from google.oauth2 import service_account
 from google.cloud import firestore
+from google.cloud.firestore_v1 import FieldFilter
 
-from newspaper_scrap import (
-    scrape_bartaman_binodon_with_articles,
-    scrape_dainik_statesman_binodan_with_articles,
-    scrape_eisamay_entertainment_with_articles,
+from http_cache import flush_cache
+import text_store
+from near_dup import NearDupIndex, signature
+from news_item import NewsItem
+from seen_index import SeenIndex
+from normalize import format_published, parse_published
 
-    BARTAMAN_CATEGORY_URL,
-    DS_CATEGORY_URL,
-    EISAMAY_ENT_CATEGORY_URL,
-)
+from sources import SOURCES, iter_source
 
 # -------------------------
 # Firestore helpers
@@ -46,46 +49,203 @@ def get_firestore_client():
     return firestore.Client(credentials=creds, project=creds.project_id)
 
 
-def push_to_firestore(items):
+# Firestore limits for batched reads / writes.
+GET_ALL_CHUNK = 100
+WRITE_BATCH_LIMIT = 500
+
+
+def _firestore_doc(item):
+    doc = {
+        "uid": item.uid,
+        "title": item.title,
+        "raw_summary": item.summary_raw,
+        "url": item.link,
+        "source": item.source,
+        "feed_url": item.feed_url,
+        "media_url": item.media_url,
+        "published_raw": item.published,
+        "published_at": item.published_dt_str,  # ISO string
+        "content_hash": item.content_hash,
+        "status": item.status,
+        "created_at": datetime.now(timezone.utc),
+    }
+    # full_text inline, as a reference to a compressed blob, or not at all
+    if text_store.MODE == "blob":
+        if item.full_text:
+            doc["full_text_ref"] = text_store.put(item.full_text)
+    elif text_store.MODE != "none":
+        doc["full_text"] = item.full_text
+    if item.duplicate_of:
+        doc["duplicate_of"] = item.duplicate_of
+    return doc
+
+
+def _create_batch(client, col, items):
     """
-    Push items to Firestore collection 'news_items'.
-    Uses uid as document ID so duplicates (same uid) are skipped.
+    create() a chunk of docs in one WriteBatch. Returns (added, skipped).
+
+    A batch is atomic, so if another writer created one of these docs after
+    our existence check the whole commit fails; we then redo the chunk
+    doc-by-doc so only the lost races are counted as skipped.
     """
-    client = get_firestore_client()
-    col = client.collection("news_items")
+    batch = client.batch()
+    for item in items:
+        batch.create(col.document(item.uid), _firestore_doc(item))
+
+    try:
+        batch.commit()
+        return len(items), 0
+    except AlreadyExists:
+        pass
 
     added = 0
     skipped = 0
-
     for item in items:
-        doc_id = item["uid"]
-        doc_ref = col.document(doc_id)
+        try:
+            col.document(item.uid).create(_firestore_doc(item))
+            added += 1
+        except AlreadyExists:
+            skipped += 1
+    return added, skipped
+
+
+def _push_batch(client, col, items, seen_index=None):
+    """
+    Existence-check + create() one group of items. Returns (added, skipped).
 
-        # Dedup – if already exists, skip
-        if doc_ref.get().exists:
+    uids found in the local `seen_index` are skipped without any Firestore
+    read. Only the remaining, probably-new ones are checked with chunked
+    get_all() calls, and new docs are written with create() in WriteBatches
+    of up to 500. Every uid that ends up existing is recorded in the index.
+    """
+    added = 0
+    skipped = 0
+
+    # Dedup within this group – first occurrence of a uid wins
+    pending = {}
+    for item in items:
+        if item.uid in pending:
             skipped += 1
             continue
+        pending[item.uid] = item
 
-        data = {
-            "uid": item["uid"],
-            "title": item["title"],
-            "raw_summary": item["summary_raw"],
-            "full_text": item.get("full_text", ""),   # 👈 ADD THIS
-            "url": item["link"],
-            "source": item["source"],
-            "feed_url": item["feed_url"],
-            "media_url": item.get("media_url") or "",
-            "published_raw": item["published"],
-            "published_at": item.get("published_dt_str", ""),  # ISO string
-            "status": "raw",
-            "created_at": datetime.now(timezone.utc),
-        }
+    # Dedup against the local index – a hit is known to exist already
+    if seen_index is not None:
+        for uid in seen_index.known_uids(pending):
+            del pending[uid]
+            skipped += 1
 
+    # Dedup against Firestore – if already exists, skip
+    uids = list(pending)
+    for i in range(0, len(uids), GET_ALL_CHUNK):
+        refs = [col.document(uid) for uid in uids[i:i + GET_ALL_CHUNK]]
+        for snap in client.get_all(refs, field_paths=["uid"]):
+            if snap.exists:
+                existing = pending.pop(snap.id, None)
+                if existing is not None:
+                    skipped += 1
+                    if seen_index is not None:
+                        seen_index.add([(existing.uid, existing.link)])
+
+    new_items = list(pending.values())
+    for i in range(0, len(new_items), WRITE_BATCH_LIMIT):
+        chunk = new_items[i:i + WRITE_BATCH_LIMIT]
+        batch_added, batch_skipped = _create_batch(client, col, chunk)
+        added += batch_added
+        skipped += batch_skipped
+        # Created by us or by whoever won the race: either way it exists now.
+        if seen_index is not None:
+            seen_index.add((item.uid, item.link) for item in chunk)
+
+    return added, skipped
+
+
+# Streaming sink: flush every N items or every N seconds, whichever first.
+SINK_BATCH_SIZE = int(os.getenv("COLLECTOR_BATCH_SIZE", "20"))
+SINK_FLUSH_SECONDS = float(os.getenv("COLLECTOR_FLUSH_SECONDS", "10"))
+
+
+class FirestoreSink:
+    """
+    Buffers items and pushes them to 'news_items' in small batches as they
+    arrive, so work is persisted while the scrape is still running and a
+    crash only loses the current buffer. Use as a context manager: the
+    buffer is flushed on exit, including on errors.
+    """
 
-        doc_ref.set(data)
-        added += 1
+    def __init__(self, client, batch_size=SINK_BATCH_SIZE, flush_seconds=SINK_FLUSH_SECONDS,
+                 seen_index=None):
+        self.client = client
+        self.seen_index = seen_index
+        self.col = client.collection("news_items")
+        self.batch_size = max(1, batch_size)
+        self.flush_seconds = flush_seconds
+        self.added = 0
+        self.skipped = 0
+        self._buffer = []
+        self._seen = set()
+        self._last_flush = time.monotonic()
+
+    def add(self, item):
+        # Dedup across batches within this run
+        if item.uid in self._seen:
+            self.skipped += 1
+            return
+        self._seen.add(item.uid)
+
+        self._buffer.append(item)
+        if (len(self._buffer) >= self.batch_size
+                or time.monotonic() - self._last_flush >= self.flush_seconds):
+            self.flush()
+
+    def flush(self):
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        items, self._buffer = self._buffer, []
+        added, skipped = _push_batch(self.client, self.col, items, self.seen_index)
+        self.added += added
+        self.skipped += skipped
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
+        print(f"\nFirestore push: added {self.added}, skipped {self.skipped} (already existed).")
+        return False
+
+
+# Firestore caps the number of values in an "in" filter.
+IN_QUERY_LIMIT = 30
+
+
+def find_known_urls(client, urls, seen_index=None):
+    """
+    Return the subset of `urls` that already have a doc in 'news_items'.
 
-    print(f"\nFirestore push: added {added}, skipped {skipped} (already existed).")
+    Lets the scrapers skip article fetches for stories we already stored.
+    URLs in the local `seen_index` are answered without touching Firestore;
+    only the rest are queried. On any Firestore error we return just the
+    local hits, i.e. fetch everything else.
+    """
+    col = client.collection("news_items")
+    urls = list(dict.fromkeys(u for u in urls if u))
+    known = seen_index.known_urls(urls) if seen_index is not None else set()
+    unknown = [u for u in urls if u not in known]
+
+    try:
+        for i in range(0, len(unknown), IN_QUERY_LIMIT):
+            chunk = unknown[i:i + IN_QUERY_LIMIT]
+            docs = col.where(filter=FieldFilter("url", "in", chunk)).select(["url"]).stream()
+            for doc in docs:
+                known.add(doc.get("url"))
+                if seen_index is not None:
+                    seen_index.add([(doc.id, doc.get("url"))])
+    except Exception as e:
+        print(f"Known-URL lookup failed, fetching the remaining articles: {e}")
+
+    return known
 
 
 # -------------------------
@@ -113,167 +273,160 @@ def get_source_name(feed, feed_url):
 # -------------------------
 
 
-def collect_scraped():
-    """
-    Use scraped Bartaman + Dainik Statesman + Eisamay instead of RSS.
-    Returns a list of dicts compatible with the old RSS pipeline.
-    """
-    rows = []
-
-    # ---------- Bartaman ----------
-    try:
-        bartaman_items = scrape_bartaman_binodon_with_articles()
-
-    except Exception as e:
-        print(f"Error scraping Bartaman: {e}")
-        bartaman_items = []
-
-    for item in bartaman_items:
-        ad = item.get("article_details") or {}
-
-        title = (ad.get("article_title") or item.get("title") or "").strip()
-        link = (item.get("article_url") or "").strip()
-        summary = (ad.get("short_description") or "").strip()
-        media_url = (ad.get("article_image_url") or item.get("card_image_url") or "").strip()
-        published = (ad.get("date") or "").strip()
-        full_text = (ad.get("full_text") or "").strip()   # 👈 NEW
-
-        # keep all original scraped fields
-        row = dict(item)
-        # and override / add normalized fields
-        row.update({
-            "uid": make_uid(link, title),
-            "source": "Bartaman Binodon",
-            "feed_url": BARTAMAN_CATEGORY_URL,
-            "title": title,
-            "summary_raw": summary,
-            "full_text": full_text,      # 👈 TOP-LEVEL FIELD
-            "link": link,
-            "published": published,
-            "media_url": media_url,
-            "status": "raw",
-        })
-
-        rows.append(row)
-
-
-    # ---------- Dainik Statesman ----------
-    try:
-        ds_items = scrape_dainik_statesman_binodan_with_articles()
-    except Exception as e:
-        print(f"Error scraping Dainik Statesman: {e}")
-        ds_items = []
-
-    for item in ds_items:
-        ad = item.get("article_details") or {}
-
-        title = (ad.get("article_title") or item.get("title") or "").strip()
-        link = (item.get("article_url") or "").strip()
-        summary = (ad.get("short_description") or "").strip()
-        media_url = (ad.get("article_image_url") or item.get("card_image_url") or "").strip()
-        published = (ad.get("date") or "").strip()
-        full_text = (ad.get("full_text") or "").strip()   # 👈 NEW
-
-        row = dict(item)
-        row.update({
-            "uid": make_uid(link, title),
-            "source": "Dainik Statesman Binodan",
-            "feed_url": DS_CATEGORY_URL,
-            "title": title,
-            "summary_raw": summary,
-            "full_text": full_text,      # 👈 NEW
-            "link": link,
-            "published": published,
-            "media_url": media_url,
-            "status": "raw",
-        })
-
-        rows.append(row)
-
-
-    # ---------- Eisamay Entertainment ----------
-    try:
-        es_items = scrape_eisamay_entertainment_with_articles()
-    except Exception as e:
-        print(f"Error scraping Eisamay: {e}")
-        es_items = []
-
-    for item in es_items:
-        ad = item.get("article_details") or {}
-
-        title = (ad.get("article_title") or item.get("title") or "").strip()
-        link = (item.get("article_url") or "").strip()
-        summary = (ad.get("short_description") or item.get("listing_subheadline") or "").strip()
-        media_url = (ad.get("article_image_url") or item.get("card_image_url") or "").strip()
-        published = (ad.get("date") or "").strip()
-        full_text = (ad.get("full_text") or "").strip()   # 👈 NEW
+def normalize_item(spec, item) -> NewsItem:
+    """Scraped {**card, "article_details": ...} -> slim NewsItem for the pipeline."""
+    ad = item.get("article_details") or {}
+
+    title = (ad.get("article_title") or item.get("title") or "").strip()
+    link = (item.get("article_url") or "").strip()
+    summary = (
+        ad.get("short_description")
+        or (item.get(spec.summary_fallback) if spec.summary_fallback else None)
+        or ""
+    ).strip()
+    media_url = (ad.get("article_image_url") or item.get("card_image_url") or "").strip()
+    published = (ad.get("date") or "").strip()
+    full_text = (ad.get("full_text") or "").strip()
+
+    return NewsItem(
+        uid=make_uid(link, title),
+        source=spec.name,
+        feed_url=spec.category_url,
+        title=title,
+        summary_raw=summary,
+        link=link,
+        published=published,
+        media_url=media_url,
+        full_text=full_text,
+    )
 
-        row = dict(item)
-        row.update({
-            "uid": make_uid(link, title),
-            "source": "Eisamay Entertainment",
-            "feed_url": EISAMAY_ENT_CATEGORY_URL,
-            "title": title,
-            "summary_raw": summary,
-            "full_text": full_text,      # 👈 NEW
-            "link": link,
-            "published": published,
-            "media_url": media_url,
-            "status": "raw",
-        })
 
-        rows.append(row)
+# Rows buffered between the scraper threads and the consumer.
+STREAM_QUEUE_SIZE = 50
 
 
-    return rows
+def iter_scraped(known_urls=None):
+    """
+    Scrape every source registered in sources.SOURCES, yielding normalized
+    rows as soon as each article is scraped, from all sources at once, in
+    completion order. `known_urls(urls) -> set` lets the scrapers skip
+    articles that are already stored (see find_known_urls).
 
+    The bounded queue applies backpressure to the scraper threads, so memory
+    stays flat no matter how slow the consumer is.
+    """
+    rows = queue.Queue(maxsize=STREAM_QUEUE_SIZE)
+    done = object()
+
+    def run(spec):
+        try:
+            for item in iter_source(spec, known_urls):
+                rows.put(normalize_item(spec, item))
+        except Exception as e:
+            print(f"Error scraping {spec.label}: {e}")
+        finally:
+            rows.put(done)
+
+    for spec in SOURCES:
+        threading.Thread(target=run, args=(spec,), daemon=True).start()
+
+    remaining = len(SOURCES)
+    while remaining:
+        row = rows.get()
+        if row is done:
+            remaining -= 1
+            continue
+        yield row
 
-# -------------------------
-# Main
-# -------------------------
 
+class _JsonArrayWriter:
+    """Writes a JSON array one element at a time, so the file grows as we go."""
 
-def main():
-    rows = collect_scraped()
+    def __init__(self, path: Path):
+        self.path = path
+        self.count = 0
+        self._fh = None
 
-    df = pd.DataFrame(rows)
+    def write(self, item):
+        self._fh.write("[\n" if self.count == 0 else ",\n")
+        self._fh.write(json.dumps(item.to_json(), ensure_ascii=False))
+        self._fh.flush()
+        self.count += 1
 
-    # 1) Parse published → published_dt (Timestamp / NaT)
-    df["published_dt"] = pd.to_datetime(
-        df["published"],
-        utc=True,
-        errors="coerce",
-    )
+    def __enter__(self):
+        self._fh = self.path.open("w", encoding="utf-8")
+        return self
 
-    # 2) Sort by datetime
-    df = df.sort_values(by="published_dt", ascending=False).reset_index(drop=True)
+    def __exit__(self, *exc):
+        self._fh.write("[]\n" if self.count == 0 else "\n]\n")
+        self._fh.close()
+        return False
 
-    # 3) Make a STRING version for JSON (NaT becomes NaN, then we fill with "")
-    df["published_dt_str"] = df["published_dt"].dt.strftime("%Y-%m-%dT%H:%M:%S%z")
-    df["published_dt_str"] = df["published_dt_str"].fillna("")
 
-    # 4) Drop the Timestamp column (so JSON never sees it)
-    df = df.drop(columns=["published_dt"])
+# -------------------------
+# Main
+# -------------------------
 
-    # 5) To dict – now all values are plain Python types
-    items = df.to_dict(orient="records")
 
-    # 6) Save JSON (for debugging / local inspection)
-    OUTFILE.write_text(
-        json.dumps(items, ensure_ascii=False, indent=2),
-        encoding="utf-8",
-    )
-    print(f"Saved {len(items)} items to {OUTFILE.resolve()}")
+# Skip items published more than this many hours ago (0 = keep everything).
+MAX_ITEM_AGE_HOURS = float(os.getenv("MAX_ITEM_AGE_HOURS", "0"))
 
-    # Debug print a few headlines
-    for i, item in enumerate(items[:3], start=1):
-        print("=" * 80)
-        print(f"[{i}] {item['source']}")
-        print(f"    {item['published_dt_str']}")
-        print(f"    {item['title']}")
 
-    # 7) Push to Firestore
-    push_to_firestore(items)
+def main():
+    client = get_firestore_client()
+    cutoff = None
+    if MAX_ITEM_AGE_HOURS > 0:
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=MAX_ITEM_AGE_HOURS)
+    # Local uid/URL index restored from the cache dir: hits skip Firestore.
+    seen_index = SeenIndex()
+    known_urls = lambda urls: find_known_urls(client, urls, seen_index)
+
+    # Same story on several sites: only the first copy stays "raw" and goes
+    # to the Gemini processor; the rest are stored as status="duplicate".
+    near_dups = NearDupIndex()
+
+    # Stream: scrape → normalize → dedup → batched Firestore sink.
+    # Items are persisted as they arrive, so a crash keeps the work done.
+    with FirestoreSink(client, seen_index=seen_index) as sink, _JsonArrayWriter(OUTFILE) as out:
+        try:
+            for row in iter_scraped(known_urls=known_urls):
+                published_dt = parse_published(row.published, row.source)
+                if cutoff and published_dt and published_dt < cutoff:
+                    # It only gets older: mark it seen so later runs don't
+                    # fetch its article page again while it stays listed.
+                    seen_index.add([(row.uid, row.link)])
+                    continue
+
+                sig = signature(row.title, row.full_text)
+                representative = near_dups.find(row.uid, sig)
+                if representative:
+                    row.status = "duplicate"
+                    row.duplicate_of = representative
+                else:
+                    near_dups.add(row.uid, sig)
+
+                row.published_dt_str = format_published(published_dt)
+                out.write(row)
+                sink.add(row)
+
+                # Debug print the first few headlines
+                if out.count <= 3:
+                    print("=" * 80)
+                    print(f"[{out.count}] {row.source}")
+                    print(f"    {row.published_dt_str}")
+                    print(f"    {row.title}")
+        finally:
+            near_dups.save()
+
+    flush_cache()
+    seen_index.close()
+    if text_store.MODE == "blob":
+        text_store.prune()
+
+    if out.count == 0:
+        print("No new items scraped.")
+    else:
+        print(f"Saved {out.count} items to {OUTFILE.resolve()}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,42 @@
+# news_item.py
+import hashlib
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+
+@dataclass(slots=True)
+class NewsItem:
+    """
+    One normalized scraped story: only the fields the collector, Firestore
+    and the processor use. The raw card / article_details dicts are not
+    kept, so full_text exists once per item instead of twice.
+    """
+    uid: str
+    source: str
+    feed_url: str
+    title: str
+    summary_raw: str
+    link: str
+    published: str
+    media_url: str = ""
+    full_text: str = ""
+    # sha256 over title + summary + full_text; changes when the story does.
+    content_hash: str = ""
+    status: str = "raw"
+    duplicate_of: Optional[str] = None
+    published_dt_str: str = ""
+
+    def __post_init__(self):
+        if not self.content_hash:
+            self.content_hash = content_hash(self.title, self.summary_raw, self.full_text)
+
+    def to_json(self) -> dict:
+        """Debug-dump form: everything but the article body."""
+        data = asdict(self)
+        data["full_text_chars"] = len(data.pop("full_text"))
+        return data
+
+
+def content_hash(title: str, summary: str, full_text: str) -> str:
+    blob = "\x1f".join((title or "", summary or "", full_text or ""))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
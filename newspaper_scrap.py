@@ -1,633 +1,410 @@
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Callable, Optional, Tuple
+
+from bs4 import BeautifulSoup, NavigableString, SoupStrainer
+from urllib.parse import urljoin, urlparse
 import time
 import re
 
-HEADERS = {
-    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
-}
+from http_cache import fetch_page
+from html_parse import make_soup
+from metadata import extract_head_metadata
 
 # ==============================
-#  BARTAMAN BINODON
+#  CONCURRENT ARTICLE FETCHING
 # ==============================
 
-BARTAMAN_BASE_URL = "https://bartamanpatrika.com"
-BARTAMAN_CATEGORY_URL = "https://bartamanpatrika.com/category/binodon"
-
-
-def scrape_bartaman_binodon_cards(url: str):
-    """Scrape the Bartaman Binodon listing page and return basic card info."""
-    resp = requests.get(url, headers=HEADERS)
-    resp.raise_for_status()
-
-    soup = BeautifulSoup(resp.text, "html.parser")
-    cards_data = []
-
-    for card in soup.select("div.col-md-4 > div.sg-post"):
-        # Title + article URL
-        title_link = card.select_one(".entry-content.catepage-grid a")
-        if title_link:
-            title_text = title_link.get_text(strip=True)
-            article_url = urljoin(url, title_link.get("href", "").strip())
-        else:
-            title_text = None
-            article_url = None
-
-        # Image URL
-        img_tag = card.select_one(".entry-header.catepage-img img")
-        image_url = None
-        if img_tag:
-            img_src = img_tag.get("data-original") or img_tag.get("src")
-            if img_src:
-                image_url = urljoin(url, img_src.strip())
-
-        # Category
-        cat_link = card.select_one(".category ul.global-list li a")
-        if cat_link:
-            category_text = cat_link.get_text(strip=True)
-            category_url = urljoin(url, cat_link.get("href", "").strip())
-        else:
-            category_text = None
-            category_url = None
-
-        cards_data.append({
-            "title": title_text,
-            "article_url": article_url,
-            "card_image_url": image_url,
-            "category": category_text,
-            "category_url": category_url,
-        })
-
-    return cards_data
-
-
-def scrape_bartaman_article(article_url: str):
-    """Scrape a single Bartaman article page."""
-    resp = requests.get(article_url, headers=HEADERS)
-    resp.raise_for_status()
-
-    soup = BeautifulSoup(resp.text, "html.parser")
-
-    # --- Title ---
-    title_tag = soup.select_one("h3.entry-title.articletitle")
-    if not title_tag:
-        title_tag = soup.find(["h1", "h2", "h3"])
-    title = title_tag.get_text(strip=True) if title_tag else None
-
-    # --- Short description ---
-    short_desc_tag = soup.select_one("div.entry-content.shortdes p")
-    short_description = short_desc_tag.get_text(" ", strip=True) if short_desc_tag else None
-
-    # --- Main article image ---
-    img_tag = soup.select_one(".entry-header .entry-thumbnail img") or \
-              soup.select_one(".entry-thumbnail img")
-    article_image_url = None
-    if img_tag:
-        img_src = img_tag.get("data-original") or img_tag.get("src")
-        if img_src:
-            article_image_url = urljoin(article_url, img_src.strip())
-
-    # --- Author + date ---
-    author_tag = soup.select_one(".post-author .text h3")
-    date_tag = soup.select_one(".post-author .text h6")
-    author = author_tag.get_text(strip=True) if author_tag else None
-    date_str = date_tag.get_text(strip=True) if date_tag else None
-
-    # --- Full article text ---
-    full_paragraphs = []
-
-    # Prefer entry-content blocks that are NOT shortdes
-    content_blocks = soup.select("div.entry-content")
-    content_block = None
-
-    for block in content_blocks:
-        classes = block.get("class", [])
-        # We want p-4 but not shortdes
-        if "p-4" in classes and "shortdes" not in classes:
-            content_block = block
-            break
-
-    # Fallback: if we didn't find a clean one, try second entry-content
-    if content_block is None and len(content_blocks) >= 2:
-        content_block = content_blocks[1]
-    if content_block is None and content_blocks:
-        content_block = content_blocks[0]
-
-    if content_block is not None:
-        paragraph_container = content_block.select_one("div.paragraph") or content_block
-        for p in paragraph_container.select("p"):
-            text = p.get_text(" ", strip=True)
-            if text:
-                full_paragraphs.append(text)
-
-    full_text = "\n\n".join(full_paragraphs) if full_paragraphs else None
-
-
-    return {
-        "article_title": title,
-        "short_description": short_description,
-        "article_image_url": article_image_url,
-        "author": author,
-        "date": date_str,
-        "full_text": full_text,
-    }
+# How many article pages may be in flight per host at once, and the minimum
+# gap (seconds) between starting two requests to the same host.
+# SCRAPE_CONCURRENCY=1 + SCRAPE_DELAY=1 reproduces the old serial behaviour.
+SCRAPE_CONCURRENCY = int(os.getenv("SCRAPE_CONCURRENCY", "4"))
+SCRAPE_DELAY = float(os.getenv("SCRAPE_DELAY", "0.25"))
 
 
-def scrape_bartaman_binodon_with_articles():
-    """Entry function for Bartaman: listing page -> each article page."""
-    cards = scrape_bartaman_binodon_cards(BARTAMAN_CATEGORY_URL)
-    results = []
+class _HostLimiter:
+    """Caps concurrent requests to one host and spaces out their start times."""
 
-    for idx, card in enumerate(cards, start=1):
-        url = card.get("article_url")
-        if not url:
-            continue
+    def __init__(self, concurrency: int, delay: float):
+        self._slots = threading.BoundedSemaphore(max(1, concurrency))
+        self._delay = max(0.0, delay)
+        self._lock = threading.Lock()
+        self._next_start = 0.0
 
-        print(f"[Bartaman {idx}/{len(cards)}] Fetching article: {url}")
-        try:
-            article_data = scrape_bartaman_article(url)
+    def __enter__(self):
+        self._slots.acquire()
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self._delay
+        if start > now:
+            time.sleep(start - now)
+        return self
 
+    def __exit__(self, *exc):
+        self._slots.release()
+        return False
 
-        except Exception as e:
-            print(f"  !! Error scraping Bartaman article {url}: {e}")
-            article_data = None
 
-        combined = {**card, "article_details": article_data}
-        results.append(combined)
-        time.sleep(1)
+_limiters = {}
+_limiters_lock = threading.Lock()
 
-    return results
 
+def _limiter_for(url: str, concurrency: int, delay: float) -> _HostLimiter:
+    # The first caller for a host fixes its limits for the rest of the run.
+    host = urlparse(url).netloc
+    with _limiters_lock:
+        if host not in _limiters:
+            _limiters[host] = _HostLimiter(concurrency, delay)
+        return _limiters[host]
 
-# ==============================
-#  DAINIK STATESMAN BINODAN
-# ==============================
 
-DS_BASE_URL = "https://www.dainikstatesmannews.com"
-DS_CATEGORY_URL = "https://www.dainikstatesmannews.com/binodan/"
+def iter_articles(cards, scrape_article, label: str, known_urls=None,
+                  concurrency: int = SCRAPE_CONCURRENCY, delay: float = SCRAPE_DELAY):
+    """
+    Fetch the article page behind every card, in parallel but politely
+    (at most `concurrency` requests in flight per host, `delay` seconds
+    between request starts), yielding each {**card, "article_details": ...}
+    as soon as it is done.
 
+    `known_urls`, if given, is called once with all card URLs and returns the
+    subset that is already stored downstream; those cards are dropped without
+    fetching their article page.
 
-def scrape_dainik_statesman_binodan_cards(url: str):
+    Cards without an article_url are dropped, failed fetches get None.
     """
-    Scrape the Dainik Statesman Binodan listing page and return basic card info.
-
-    HTML example:
-
-    <div class="col-md-4">
-      <div class="post-block-style">
-        <div class="post-thumb">
-          <a href="ARTICLE_URL">
-            <img src="IMAGE_URL" ...>
-          </a>
-        </div>
-        <div class="post-content">
-          <h3 class="post-title title-md">
-            <a href="ARTICLE_URL"> TITLE </a>
-          </h3>
-          <div class="post-meta mb-7">
-            <span class="post-author">... AUTHOR ...</span>
-            <span class="post-date">0 mins read</span>
-          </div>
-        </div>
-      </div>
-    </div>
+    if known_urls is not None:
+        known = known_urls([c["article_url"] for c in cards if c.get("article_url")])
+        if known:
+            print(f"[{label}] Skipping {len(known)} already-stored article(s)")
+            cards = [c for c in cards if c.get("article_url") not in known]
+
+    jobs = [(idx, card) for idx, card in enumerate(cards, start=1) if card.get("article_url")]
+    if not jobs:
+        return
+
+    def fetch_one(job):
+        idx, card = job
+        url = card["article_url"]
+        with _limiter_for(url, concurrency, delay):
+            print(f"[{label} {idx}/{len(cards)}] Fetching article: {url}")
+            try:
+                article_data = scrape_article(url)
+            except Exception as e:
+                print(f"  !! Error scraping {label} article {url}: {e}")
+                article_data = None
+        return {**card, "article_details": article_data}
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        futures = [pool.submit(fetch_one, job) for job in jobs]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def _lazy_soup(page):
     """
-    resp = requests.get(url, headers=HEADERS)
-    resp.raise_for_status()
+    Callable returning the page's full tree, parsed on first call only.
 
-    soup = BeautifulSoup(resp.text, "html.parser")
-    cards_data = []
+    Article scrapers take metadata from <head> and the body text from a
+    strained tree, so the full parse only happens when a field is missing.
+    """
+    soup = None
 
-    for col in soup.select("div.col-md-4"):
-        card = col.select_one("div.post-block-style")
-        if not card:
-            continue
+    def get():
+        nonlocal soup
+        if soup is None:
+            soup = make_soup(page)
+        return soup
 
-        # --- Title + article URL ---
-        title_link = card.select_one(".post-content h3.post-title a")
-        if title_link:
-            title_text = title_link.get_text(strip=True)
-            href = title_link.get("href", "").strip()
-            article_url = urljoin(DS_BASE_URL, href)
-        else:
-            title_text = None
-            article_url = None
-
-        # --- Image URL ---
-        img_tag = card.select_one(".post-thumb img")
-        card_image_url = None
-        if img_tag:
-            img_src = img_tag.get("src")
-            if img_src:
-                card_image_url = urljoin(DS_BASE_URL, img_src.strip())
-
-        # --- Author + read-time ---
-        author_span = card.select_one(".post-meta .post-author")
-        if author_span:
-            author_text = author_span.get_text(" ", strip=True).replace("\xa0", " ")
-        else:
-            author_text = None
-
-        read_span = card.select_one(".post-meta .post-date")
-        read_time = read_span.get_text(" ", strip=True) if read_span else None
-
-        cards_data.append({
-            "title": title_text,
-            "article_url": article_url,
-            "card_image_url": card_image_url,
-            "author": author_text,
-            "read_time": read_time,
-        })
+    return get
 
-    return cards_data
 
 
-def _ds_extract_author_and_date_from_text(soup: BeautifulSoup):
+
+# ==============================
+#  SELECTOR-DRIVEN SCRAPING
+# ==============================
+
+# CSS selectors tried in order; the first one that matches wins.
+Selectors = Tuple[str, ...]
+
+# How a matched tag's text is read. Fields default to "spaced"; sites whose
+# markup splits words across inline tags read some fields "joined".
+_TEXT_MODES = {
+    "spaced": lambda tag: tag.get_text(" ", strip=True),          # strings joined by a space
+    "joined": lambda tag: tag.get_text(strip=True),               # strings glued together
+    "plain": lambda tag: tag.get_text(" ", strip=True).replace("\xa0", " "),  # spaced, no &nbsp;
+}
+# Per-field text mode as (field, mode); unlisted fields are "spaced".
+TextModes = Tuple[Tuple[str, str], ...]
+
+
+@dataclass(frozen=True)
+class CardSelectors:
+    """Where one listing-page card and its fields are; fields are relative to the card."""
+    card: str
+    link: Selectors                            # <a> whose href is the article URL
+    title: Selectors
+    image: Selectors = ()
+    image_attrs: Tuple[str, ...] = ("src",)
+    # Extra card fields as (name, selectors); the matched tag's text is kept.
+    extra: Tuple[Tuple[str, Selectors], ...] = ()
+    # Only build these subtrees of the listing page (html_parse.strainer).
+    parse_only: Optional[SoupStrainer] = None
+    text_modes: TextModes = ()                 # keys: "title" and the extra names
+
+
+@dataclass(frozen=True)
+class ArticleSelectors:
     """
-    Fallback text-based parse for author + 'Published:' line on Dainik Statesman.
-    Looks for patterns like:
-      'Some Author | Kolkata'
-      'Published: December 2, 2025 12:20 pm'
+    Where an article page's fields are in the DOM. title / image / author /
+    date are only looked up when the page <head> (JSON-LD / OpenGraph)
+    doesn't declare them.
     """
-    full_text = soup.get_text("\n", strip=True)
+    body: Selectors                            # container whose <p>s are the full text
+    # Build only this part of the page for the body; the full tree is a fallback.
+    body_parse_only: Optional[SoupStrainer] = None
+    # With no container at all, use every <p> of the page.
+    body_fallback_to_page: bool = True
+    # Short description; without it the first paragraph is used.
+    summary: Selectors = ()
+    title: Selectors = ("h1", "title")
+    image: Selectors = ()
+    image_attrs: Tuple[str, ...] = ("src",)
+    author: Selectors = ()
+    date: Selectors = ()                       # a datetime= attribute beats the text
+    # Site-specific last resort: full soup -> (author, date).
+    byline: Optional[Callable] = None
+    skip_prefixes: Tuple[str, ...] = ("advertisement",)
+    text_modes: TextModes = ()                 # keys: "title", "summary", "author", "date"
+
+
+def _select_first(root, selectors):
+    for css in selectors:
+        tag = root.select_one(css)
+        if tag is not None:
+            return tag
+    return None
+
+
+def _text(tag, mode="spaced"):
+    if tag is None:
+        return None
+    return _TEXT_MODES[mode](tag)
+
+
+def _text_reader(text_modes: TextModes):
+    # field name -> function reading a tag's text the way that field wants
+    modes = dict(text_modes)
+    return lambda tag, field: _text(tag, modes.get(field, "spaced"))
+
+
+def _url_attr(tag, attrs, base_url):
+    # urljoin also turns protocol-relative //cdn/... into https://cdn/...
+    if tag is None:
+        return None
+    for attr in attrs:
+        value = (tag.get(attr) or "").strip()
+        if value:
+            return urljoin(base_url, value)
+    return None
+
+
+def parse_cards(page, selectors: CardSelectors):
+    """Listing page -> [{"title", "article_url", "card_image_url", **extra}], deduped by URL."""
+    soup = make_soup(page, selectors.parse_only)
+    text = _text_reader(selectors.text_modes)
+    cards = []
+    seen_urls = set()
 
-    date_match = re.search(r"Published:\s*(.+)", full_text)
-    date_str = date_match.group(1).strip() if date_match else None
+    for card in soup.select(selectors.card):
+        link = _select_first(card, selectors.link)
+        href = (link.get("href") or "").strip() if link else ""
+        if not href:
+            continue
 
-    author_match = re.search(
-        r"([^\n]+?)\s*\|\s*[^\n]*\n\s*Published:",
-        full_text
-    )
-    author = author_match.group(1).strip() if author_match else None
+        article_url = urljoin(page.url, href)
+        if article_url in seen_urls:
+            continue
+        seen_urls.add(article_url)
 
-    return author, date_str
+        data = {
+            "title": text(_select_first(card, selectors.title), "title"),
+            "article_url": article_url,
+            "card_image_url": _url_attr(
+                _select_first(card, selectors.image), selectors.image_attrs, page.url
+            ),
+        }
+        for name, field_selectors in selectors.extra:
+            data[name] = text(_select_first(card, field_selectors), name)
+        cards.append(data)
+
+    return cards
 
 
-def scrape_dainik_statesman_article(article_url: str):
+def parse_article(page, selectors: ArticleSelectors):
     """
-    Scrape a single Dainik Statesman article page.
+    Article page -> {"article_title", "short_description", "article_image_url",
+    "author", "date", "full_text"}.
+
+    Metadata comes from <head> first and the body text from a strained tree
+    of the content container, so the full tree is only parsed when some
+    field has to come from elsewhere in the DOM.
     """
-    resp = requests.get(article_url, headers=HEADERS)
-    resp.raise_for_status()
-
-    soup = BeautifulSoup(resp.text, "html.parser")
-
-    # --- Title ---
-    title_tag = (
-        soup.select_one("h1.entry-title")
-        or soup.select_one("h1.post-title")
-        or soup.find("h1")
-        or soup.find("title")
-    )
-    article_title = title_tag.get_text(strip=True) if title_tag else None
-
-    # --- Main article image ---
-    img_tag = (
-        soup.select_one("article .post-thumb img")
-        or soup.select_one(".single-post-thumb img")
-        or soup.select_one("img.wp-post-image")
-    )
-    article_image_url = None
-    if img_tag:
-        img_src = img_tag.get("src")
-        if img_src:
-            article_image_url = urljoin(article_url, img_src.strip())
-
-    # --- Full text paragraphs ---
-    content_block = (
-        soup.select_one("article div.entry-content")
-        or soup.select_one("article")
-        or soup.select_one("div.entry-content")
-        or soup
-    )
+    meta = extract_head_metadata(page)
+    full_soup = _lazy_soup(page)
+    text = _text_reader(selectors.text_modes)
+
+    def from_dom(field_selectors):
+        return _select_first(full_soup(), field_selectors) if field_selectors else None
+
+    # --- Body ---
+    strained = selectors.body_parse_only is not None
+    body_soup = make_soup(page, selectors.body_parse_only) if strained else full_soup()
+    container = _select_first(body_soup, selectors.body)
+    if container is None and strained:
+        container = from_dom(selectors.body)
+    if container is None and selectors.body_fallback_to_page:
+        container = full_soup()
 
     paragraphs = []
-    for p in content_block.find_all("p"):
-        text = p.get_text(" ", strip=True)
-        if not text:
-            continue
-        if text.lower().startswith("advertisement"):
-            continue
-        paragraphs.append(text)
-
-    full_text = "\n\n".join(paragraphs) if paragraphs else None
-    short_description = paragraphs[0] if paragraphs else None
-
-    # --- Author + date (fallback from text) ---
-    author, date_str = _ds_extract_author_and_date_from_text(soup)
+    if container is not None:
+        for p in container.find_all("p"):
+            para = p.get_text(" ", strip=True)
+            if para and not para.lower().startswith(selectors.skip_prefixes):
+                paragraphs.append(para)
+
+    if selectors.summary:
+        short_description = text(_select_first(body_soup, selectors.summary), "summary")
+    else:
+        short_description = paragraphs[0] if paragraphs else None
+
+    # --- Head metadata, DOM selectors only for gaps ---
+    title = meta["title"] or text(from_dom(selectors.title), "title")
+    image_url = meta["image"] or _url_attr(from_dom(selectors.image), selectors.image_attrs, page.url)
+
+    author = meta["author"] or text(from_dom(selectors.author), "author")
+    date_str = meta["date"]
+    if not date_str:
+        date_tag = from_dom(selectors.date)
+        if date_tag is not None:
+            date_str = date_tag.get("datetime") or text(date_tag, "date")
+
+    if selectors.byline and not (author and date_str):
+        byline_author, byline_date = selectors.byline(full_soup())
+        author = author or byline_author
+        date_str = date_str or byline_date
 
     return {
-        "article_title": article_title,
+        "article_title": title,
         "short_description": short_description,
-        "article_image_url": article_image_url,
+        "article_image_url": image_url,
         "author": author,
         "date": date_str,
-        "full_text": full_text,
+        "full_text": "\n\n".join(paragraphs) if paragraphs else None,
     }
 
 
-def scrape_dainik_statesman_binodan_with_articles():
+def scrape_cards(url: str, selectors: CardSelectors, version=None):
     """
-    Entry function for Dainik Statesman:
-      1. Scrape listing/cards
-      2. For each card, scrape article details
+    Fetch + parse a listing page. When the page is unchanged (304) and was
+    parsed by the same `version` of the scraper, the stored result is reused.
     """
-    cards = scrape_dainik_statesman_binodan_cards(DS_CATEGORY_URL)
-    results = []
+    page = fetch_page(url, version)
+    if page.parsed is not None:
+        return page.parsed
+    return page.store_parsed(parse_cards(page, selectors))
 
-    for idx, card in enumerate(cards, start=1):
-        url = card.get("article_url")
-        if not url:
-            continue
 
-        print(f"[Dainik Statesman {idx}/{len(cards)}] Fetching article: {url}")
-        try:
-            article_data = scrape_dainik_statesman_article(url)
-        except Exception as e:
-            print(f"  !! Error scraping DS article {url}: {e}")
-            article_data = None
-
-        combined = {**card, "article_details": article_data}
-        results.append(combined)
-        time.sleep(1)
-
-    return results
-from urllib.parse import urljoin
-import requests
-from bs4 import BeautifulSoup
-import time
+def scrape_article(url: str, selectors: ArticleSelectors, version=None):
+    """Fetch + parse one article page, with the same caching as scrape_cards."""
+    page = fetch_page(url, version)
+    if page.parsed is not None:
+        return page.parsed
+    return page.store_parsed(parse_article(page, selectors))
+
 
 # ==============================
-#  EISAMAY ENTERTAINMENT
+#  DAINIK STATESMAN BYLINE
 # ==============================
 
-EISAMAY_BASE_URL = "https://eisamay.com"
-EISAMAY_ENT_CATEGORY_URL = "https://eisamay.com/entertainment"
+_DS_PUBLISHED_RE = re.compile(r"Published:\s*(.+)")
+_DS_AUTHOR_RE = re.compile(r"([^\n]+?)\s*\|\s*[^\n]*\n\s*Published:")
 
+# Text nodes looked at on each side of the 'Published:' node.
+_DS_BYLINE_WINDOW = 4
 
-def _fix_protocol(src: str) -> str:
-    """
-    Eisamay uses protocol-relative URLs like //media.assettype.com/...
-    This normalizes them to https://...
-    """
-    src = (src or "").strip()
-    if not src:
-        return ""
-    if src.startswith("//"):
-        return "https:" + src
-    return src
-
-
-def scrape_eisamay_entertainment_cards(url: str):
-    """
-    Scrape Eisamay 'Entertainment' listing page and return basic card info.
-
-    We DON'T hardcode the different wrapper blocks.
-    We simply grab all story cards:
-
-      <div data-test-id="story-card" ...>
-        <a data-test-id="arr--hero-image" href="ARTICLE_URL">
-          <img src="IMAGE_URL" ...>
-        </a>
-        ...
-        <div data-test-id="headline">
-          <a><h2/h6>HEADLINE</h2/h6></a>
-        </div>
-        <div data-test-id="subheadline">SUBHEADLINE</div>
-      </div>
-    """
-    resp = requests.get(url, headers=HEADERS, timeout=10)
-    resp.raise_for_status()
 
-    soup = BeautifulSoup(resp.text, "html.parser")
-    cards_data = []
-    seen_urls = set()
-
-    for card in soup.select('[data-test-id="story-card"]'):
-        # --- Article URL ---
-        hero_link = card.select_one('[data-test-id="arr--hero-image"]') or card.find("a", href=True)
-        if not hero_link:
-            continue
+def _is_visible_text(node) -> bool:
+    # Same strings get_text() would return: no comments, scripts, styles.
+    return type(node) is NavigableString and bool(node.strip())
 
-        href = (hero_link.get("href") or "").strip()
-        if not href:
-            continue
 
-        article_url = urljoin(EISAMAY_BASE_URL, href)
-        if article_url in seen_urls:
-            continue
+def _nearby_strings(elements, limit: int):
+    found = []
+    for node in elements:
+        if _is_visible_text(node):
+            found.append(node.strip())
+            if len(found) == limit:
+                break
+    return found
 
-        # --- Image URL ---
-        img_tag = hero_link.select_one("img")
-        card_image_url = ""
-        if img_tag:
-            img_src = img_tag.get("src") or img_tag.get("data-src")
-            if img_src:
-                card_image_url = _fix_protocol(img_src)
-
-        # --- Headline (h2 for lead, h6 for others) ---
-        headline_tag = (
-            card.select_one('[data-test-id="headline"] h2') or
-            card.select_one('[data-test-id="headline"] h6') or
-            card.select_one('[data-test-id="headline"]')
-        )
-        title_text = headline_tag.get_text(" ", strip=True) if headline_tag else None
-
-        # --- Subheadline (short summary on listing) ---
-        subheadline_tag = card.select_one('[data-test-id="subheadline"]')
-        subheadline = subheadline_tag.get_text(" ", strip=True) if subheadline_tag else None
-
-        cards_data.append({
-            "title": title_text,
-            "article_url": article_url,
-            "card_image_url": card_image_url,
-            "listing_subheadline": subheadline,
-        })
-        seen_urls.add(article_url)
 
-    return cards_data
+def _ds_extract_author_and_date_from_byline(soup: BeautifulSoup):
+    """
+    Read author + date from the byline around the first 'Published:' node,
+    without materializing the whole page's text. Runs the same regexes as the
+    full-text fallback, just over a handful of neighbouring lines.
+    """
+    node = soup.find(string=lambda s: _is_visible_text(s) and "Published:" in s)
+    if node is None:
+        return None, None
 
+    before = _nearby_strings(node.previous_elements, _DS_BYLINE_WINDOW)
+    after = _nearby_strings(node.next_elements, _DS_BYLINE_WINDOW)
+    window = "\n".join(before[::-1] + [node.strip()] + after)
 
-def _eisamay_extract_author_and_date(soup: BeautifulSoup):
-    """
-    Best-effort extraction of author + published date from the article page.
+    date_match = _DS_PUBLISHED_RE.search(window)
+    date_str = date_match.group(1).strip() if date_match else None
 
-    Layouts can change, so we try multiple patterns and fall back gracefully.
-    """
-    author = None
-    date_str = None
-
-    # Typical modern layouts often have explicit author / timestamp containers.
-    author_tag = (
-        soup.select_one("[data-test-id='author-name']") or
-        soup.select_one(".author-name") or
-        soup.select_one(".author")
-    )
-    if author_tag:
-        author = author_tag.get_text(" ", strip=True)
-
-    time_tag = (
-        soup.select_one("time") or
-        soup.select_one("[data-test-id='timestamp']") or
-        soup.select_one("span.time") or
-        soup.select_one("span.date")
-    )
-    if time_tag:
-        # Prefer machine-readable datetime if available
-        date_str = time_tag.get("datetime") or time_tag.get_text(" ", strip=True)
+    author_match = _DS_AUTHOR_RE.search(window)
+    author = author_match.group(1).strip() if author_match else None
 
     return author, date_str
 
 
-def scrape_eisamay_article(article_url: str):
+def _ds_extract_author_and_date_from_text(soup: BeautifulSoup):
     """
-    Scrape a single Eisamay entertainment article page.
-
-    Returns:
-      {
-        "article_title": ...,
-        "short_description": ...,
-        "article_image_url": ...,
-        "author": ...,
-        "date": ...,
-        "full_text": ...,
-      }
+    Last-resort text-based parse for author + 'Published:' line on Dainik Statesman.
+    Looks for patterns like:
+      'Some Author | Kolkata'
+      'Published: December 2, 2025 12:20 pm'
     """
-    resp = requests.get(article_url, headers=HEADERS, timeout=10)
-    resp.raise_for_status()
-
-    soup = BeautifulSoup(resp.text, "html.parser")
-
-    # --- Title ---
-    title_tag = (
-        soup.select_one("h1.headline-m_headline__3_NhV") or
-        soup.find("h1") or
-        soup.find("title")
-    )
-    article_title = title_tag.get_text(" ", strip=True) if title_tag else None
-
-    # --- Author + date ---
-    author, date_str = _eisamay_extract_author_and_date(soup)
-
-    # --- Main article image ---
-    # Try hero image first, then any main content image
-    img_tag = (
-        soup.select_one("[data-test-id='arr--hero-image'] img") or
-        soup.select_one("figure img.qt-image") or
-        soup.find("img")
-    )
-    article_image_url = None
-    if img_tag:
-        img_src = img_tag.get("src") or img_tag.get("data-src")
-        if img_src:
-            article_image_url = _fix_protocol(img_src)
-
-    # --- Article body text ---
-    # Eisamay (Assettype) typically wraps body in a specific container; we try a few.
-    content_block = (
-        soup.select_one("[data-test-id='article-body']") or
-        soup.select_one("div.article-body") or
-        soup.select_one("article") or
-        soup
-    )
+    full_text = soup.get_text("\n", strip=True)
 
-    paragraphs = []
-    for p in content_block.find_all("p"):
-        text = p.get_text(" ", strip=True)
-        if not text:
-            continue
-        # Basic ad/boilerplate filter (adjust if you see junk in output)
-        if text.lower().startswith("advertisement"):
-            continue
-        paragraphs.append(text)
+    date_match = _DS_PUBLISHED_RE.search(full_text)
+    date_str = date_match.group(1).strip() if date_match else None
 
-    full_text = "\n\n".join(paragraphs) if paragraphs else None
-    short_description = paragraphs[0] if paragraphs else None
+    author_match = _DS_AUTHOR_RE.search(full_text)
+    author = author_match.group(1).strip() if author_match else None
 
-    return {
-        "article_title": article_title,
-        "short_description": short_description,
-        "article_image_url": article_image_url,
-        "author": author,
-        "date": date_str,
-        "full_text": full_text,
-    }
+    return author, date_str
 
 
-def scrape_eisamay_entertainment_with_articles():
+def ds_extract_author_and_date(soup: BeautifulSoup):
     """
-    Entry function for Eisamay Entertainment:
-      1. Scrape listing/cards
-      2. For each card, scrape article details
+    Author + date for a Dainik Statesman article from the body: the byline
+    node first, and only then a whole-page scan.
     """
-    cards = scrape_eisamay_entertainment_cards(EISAMAY_ENT_CATEGORY_URL)
-    results = []
-
-    for idx, card in enumerate(cards, start=1):
-        url = card.get("article_url")
-        if not url:
-            continue
-
-        print(f"[Eisamay {idx}/{len(cards)}] Fetching article: {url}")
-        try:
-            article_data = scrape_eisamay_article(url)
-
-        except Exception as e:
-            print(f"  !! Error scraping Eisamay article {url}: {e}")
-            article_data = None
-
-        combined = {**card, "article_details": article_data}
-        results.append(combined)
-        time.sleep(1)
+    author, date_str = _ds_extract_author_and_date_from_byline(soup)
 
-    return results
-
-
-# ==============================
-#  DEMO / TEST
-# ==============================
-if __name__ == "__main__":
-    print(">>> EISAMAY ENTERTAINMENT")
-    es_data = scrape_eisamay_entertainment_with_articles()
-    for item in es_data[:5]:
-        print("=" * 80)
-        print("CARD TITLE:", item["title"])
-        print("ARTICLE URL:", item["article_url"])
-        if item["article_details"]:
-            det = item["article_details"]
-            print("ARTICLE TITLE:", det["article_title"])
-            print("AUTHOR:", det["author"])
-            print("DATE:", det["date"])
-            print("SHORT DESC:", det["short_description"])
-            full = det["full_text"] or ""
-            print("FULL TEXT :", full)
-
-    print(">>> BARTAMAN BINODON")
-    bartaman_data = scrape_bartaman_binodon_with_articles()
-    for item in bartaman_data[:3]:
-        print("=" * 80)
-        print("CARD TITLE:", item["title"])
-        print("ARTICLE URL:", item["article_url"])
-        if item["article_details"]:
-            print("ARTICLE TITLE:", item["article_details"]["article_title"])
-            print("AUTHOR:", item["article_details"]["author"])
-            print("DATE:", item["article_details"]["date"])
-            print("SHORT DESC:", item["article_details"]["short_description"])
-            full = item["article_details"]["full_text"] or ""
-            print("FULL TEXT :", full)
-
-    print("\n>>> DAINIK STATESMAN BINODAN")
-    ds_data = scrape_dainik_statesman_binodan_with_articles()
-    for item in ds_data[:3]:
-        print("=" * 80)
-        print("CARD TITLE:", item["title"])
-        print("ARTICLE URL:", item["article_url"])
-        if item["article_details"]:
-            print("ARTICLE TITLE:", item["article_details"]["article_title"])
-            print("AUTHOR:", item["article_details"]["author"])
-            print("DATE:", item["article_details"]["date"])
-            print("SHORT DESC:", item["article_details"]["short_description"])
-            full = item["article_details"]["full_text"] or ""
-            print("FULL TEXT :", full)
+    # The byline window already covers the lines the page-wide regexes would
+    # look at, so only scan the whole page when there was no byline at all.
+    if date_str is None:
+        text_author, text_date = _ds_extract_author_and_date_from_text(soup)
+        author = author or text_author
+        date_str = date_str or text_date
 
+    return author, date_str
@@ -0,0 +1,161 @@
+# normalize.py
+import re
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+
+# Output format of format_published (what Firestore 'published_at' stores).
+ISO_FORMAT = "%Y-%m-%dT%H:%M:%S%z"
+
+# All three sites publish Indian local time; naive timestamps are IST.
+IST = timezone(timedelta(hours=5, minutes=30), "IST")
+
+# -------------------------
+# Bengali → ASCII
+# -------------------------
+_BN_DIGITS = str.maketrans("০১২৩৪৫৬৭৮৯", "0123456789")
+
+_BN_WORDS = {
+    "জানুয়ারি": "January", "জানুয়ারী": "January",
+    "ফেব্রুয়ারি": "February", "ফেব্রুয়ারী": "February",
+    "মার্চ": "March",
+    "এপ্রিল": "April",
+    "মে": "May",
+    "জুন": "June",
+    "জুলাই": "July",
+    "আগস্ট": "August", "অগস্ট": "August", "অগাস্ট": "August",
+    "সেপ্টেম্বর": "September",
+    "অক্টোবর": "October",
+    "নভেম্বর": "November",
+    "ডিসেম্বর": "December",
+    "পূর্বাহ্ণ": "AM", "পূর্বাহ্ন": "AM",
+    "অপরাহ্ণ": "PM", "অপরাহ্ন": "PM",
+}
+# Longest first so e.g. "মে" never eats the start of a longer word.
+_BN_WORD_RE = re.compile("|".join(sorted(map(re.escape, _BN_WORDS), key=len, reverse=True)))
+
+# -------------------------
+# Precompiled patterns
+# -------------------------
+_MONTHS = {
+    name: num
+    for num, names in enumerate(
+        [
+            ("january", "jan"), ("february", "feb"), ("march", "mar"),
+            ("april", "apr"), ("may",), ("june", "jun"), ("july", "jul"),
+            ("august", "aug"), ("september", "sep", "sept"),
+            ("october", "oct"), ("november", "nov"), ("december", "dec"),
+        ],
+        start=1,
+    )
+    for name in names
+}
+
+# "2 December 2025", "02 December, 2025"  (Bartaman style)
+_DMY = re.compile(r"\b(?P<day>\d{1,2})(?:st|nd|rd|th)?\s+(?P<month>[A-Za-z]+)\.?\s*,?\s+(?P<year>\d{4})\b")
+# "December 2, 2025"  (Dainik Statesman style)
+_MDY = re.compile(r"\b(?P<month>[A-Za-z]+)\.?\s+(?P<day>\d{1,2})(?:st|nd|rd|th)?\s*,?\s+(?P<year>\d{4})\b")
+_TIME = re.compile(
+    r"\b(?P<hour>\d{1,2})[:.](?P<minute>\d{2})(?::(?P<second>\d{2}))?"
+    r"\s*(?P<ampm>[AaPp]\.?[Mm]\.?)?(?![A-Za-z])"
+)
+_OFFSET = re.compile(r"(?:GMT|UTC)\s*(?P<sign>[+-])(?P<hh>\d{1,2}):?(?P<mm>\d{2})")
+
+_PATTERNS_BY_SOURCE = {
+    "Bartaman Binodon": (_DMY, _MDY),
+    "Dainik Statesman Binodan": (_MDY, _DMY),
+}
+_DEFAULT_PATTERNS = (_DMY, _MDY)
+
+_RFC2822_START = re.compile(r"^[A-Za-z]{3},\s")
+
+
+def _to_ascii(text: str) -> str:
+    text = text.translate(_BN_DIGITS)
+    return _BN_WORD_RE.sub(lambda m: " " + _BN_WORDS[m.group(0)] + " ", text)
+
+
+def _parse_loose(text: str, patterns):
+    """Date (+ optional time / GMT offset) found anywhere in free text."""
+    for pattern in patterns:
+        match = pattern.search(text)
+        if match and match.group("month").lower() in _MONTHS:
+            break
+    else:
+        return None
+
+    try:
+        dt = datetime(
+            int(match.group("year")),
+            _MONTHS[match.group("month").lower()],
+            int(match.group("day")),
+        )
+    except ValueError:
+        return None
+
+    time_match = _TIME.search(text, match.end()) or _TIME.search(text, 0, match.start())
+    if time_match:
+        hour = int(time_match.group("hour"))
+        ampm = (time_match.group("ampm") or "").lower().replace(".", "")
+        if ampm == "pm" and hour < 12:
+            hour += 12
+        elif ampm == "am" and hour == 12:
+            hour = 0
+        minute = int(time_match.group("minute"))
+        second = int(time_match.group("second") or 0)
+        if hour < 24 and minute < 60 and second < 60:
+            dt = dt.replace(hour=hour, minute=minute, second=second)
+
+    offset = _OFFSET.search(text)
+    if offset:
+        delta = timedelta(hours=int(offset.group("hh")), minutes=int(offset.group("mm")))
+        sign = -1 if offset.group("sign") == "-" else 1
+        dt = dt.replace(tzinfo=timezone(sign * delta))
+
+    return dt
+
+
+@lru_cache(maxsize=4096)
+def _parse_cached(text: str, source: str):
+    dt = None
+    try:
+        dt = datetime.fromisoformat(text)
+    except ValueError:
+        pass
+
+    if dt is None and _RFC2822_START.match(text):
+        try:
+            dt = parsedate_to_datetime(text)
+        except (TypeError, ValueError, IndexError):
+            pass
+
+    if dt is None:
+        patterns = _PATTERNS_BY_SOURCE.get(source, _DEFAULT_PATTERNS)
+        dt = _parse_loose(_to_ascii(text), patterns)
+
+    if dt is None:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=IST)
+    return dt.astimezone(timezone.utc)
+
+
+def parse_published(published: str, source: str = None):
+    """
+    Parse a scraped date string into an aware UTC datetime, or None.
+
+    Handles ISO 8601, RFC 2822, English month-name dates ("December 2, 2025
+    12:20 pm") and Bengali ones ("২ ডিসেম্বর ২০২৫, ১২:২০ অপরাহ্ণ"), with
+    surrounding words like "Published:" or weekday names ignored. Times
+    without a zone are IST. `source` picks which date order to try first.
+    Results are memoized, since listings repeat the same strings every run.
+    """
+    text = (published or "").strip()
+    if not text:
+        return None
+    return _parse_cached(text, source or "")
+
+
+def format_published(dt) -> str:
+    return dt.strftime(ISO_FORMAT) if dt else ""
+
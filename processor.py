@@ -1,19 +1,30 @@
 # processor.py
-from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from google.cloud.firestore_v1 import FieldFilter
 
 import os
 import json
+import socket
+import threading
+import time
 from pathlib import Path
 
+from google.api_core.exceptions import FailedPrecondition
 from google.cloud import firestore
 from google.oauth2 import service_account
 
 from gemini_summarizer import (
+    BadReply,
+    generate_all,
+    instagram_caption,
+    quota_exhausted,
     summarize_one_liner,
     telegram_caption,
-    instagram_caption,
+    track_usage,
 )
+from llm_cache import get_cache
+import text_store
 
 
 # -------------------------
@@ -44,70 +55,544 @@ def get_firestore_client():
 # Processing logic (TEXT-ONLY)
 # -------------------------
 
-def process_one_doc(doc_ref, data: dict):
-    title = data.get("title", "") or ""
-    raw_summary = data.get("raw_summary", "") or ""
-    source = data.get("source", "") or ""
-    url = data.get("url", "") or ""
+OUTPUT_FIELDS = ("summary", "caption_telegram", "caption_instagram")
 
-    # 1) Gemini text generation
-    try:
-        one_line = summarize_one_liner(title, raw_summary)
-        cap_tg = telegram_caption(title, raw_summary, source, url)
-        cap_ig = instagram_caption(title, raw_summary, source)
-        mode = "gemini"
-        gemini_error = None
-    except Exception as e:
-        # Fallback
-        one_line = title[:120]
-        cap_tg = f"📰 {title}\n\n🔗 {url}"
-        cap_ig = f"🎬 {title}\n\nSource: {source}"
-        mode = "fallback"
-        gemini_error = str(e)
+
+def _news_fields(data: dict):
+    return tuple(data.get(k, "") or "" for k in ("title", "raw_summary", "source", "url"))
+
+
+def _full_text(data: dict) -> str:
+    """Article body stored inline or, with FULL_TEXT_STORAGE=blob, by reference."""
+    return data.get("full_text") or text_store.get(data.get("full_text_ref")) or ""
+
+
+def _fallback(field: str, title: str, source: str, url: str) -> str:
+    if field == "summary":
+        return title[:120]
+    if field == "caption_telegram":
+        return f"📰 {title}\n\n🔗 {url}"
+    return f"🎬 {title}\n\nSource: {source}"
+
+
+def generate_outputs(data: dict, fields=OUTPUT_FIELDS):
+    """
+    Generate the requested output fields for one doc.
+
+    Returns (outputs, errors): outputs maps each field that succeeded to its
+    text, errors maps each field still missing to the error message. When
+    all three are wanted, one structured call is tried first and every field
+    it delivers is kept; only the ones it left empty are requested with the
+    single-output prompts. A quota / network error stops right there: the
+    remaining fields are left pending rather than spending more calls.
+    """
+    title, raw_summary, source, url = _news_fields(data)
+    full_text = _full_text(data)
+    outputs = {}
+    errors = {}
+    fields = list(fields)
+
+    if set(fields) == set(OUTPUT_FIELDS):
+        try:
+            outputs = generate_all(title, raw_summary, source, url, full_text)
+        except BadReply as e:
+            print(f"Unusable structured Gemini reply, trying outputs one by one: {e}")
+        except Exception as e:
+            return {}, {field: str(e) for field in fields}
+        fields = [f for f in fields if f not in outputs]
+
+    single = {
+        "summary": lambda: summarize_one_liner(title, raw_summary, full_text),
+        "caption_telegram": lambda: telegram_caption(title, raw_summary, source, url, full_text),
+        "caption_instagram": lambda: instagram_caption(title, raw_summary, source, full_text).strip(),
+    }
+    for i, field in enumerate(fields):
+        try:
+            outputs[field] = single[field]()
+        except BadReply as e:
+            errors[field] = str(e)
+        except Exception as e:
+            # Quota / network trouble: don't make the remaining calls.
+            for rest in fields[i:]:
+                errors[rest] = str(e)
+            break
+
+    return outputs, errors
+
+
+def _ai_mode(errors: dict) -> str:
+    if not errors:
+        return "gemini"
+    return "fallback" if len(errors) == len(OUTPUT_FIELDS) else "partial"
+
+
+def process_one_doc(doc_ref, data: dict, writer=None):
+    title, _, source, url = _news_fields(data)
+
+    # 1) Gemini text generation; failed outputs get a crude fallback and are
+    #    left for regenerate_pending() to retry
+    with track_usage() as usage:
+        outputs, errors = generate_outputs(data)
+    for field in errors:
+        outputs[field] = _fallback(field, title, source, url)
 
     # 2) Firestore update (NO HASHTAGS)
     update_data = {
-        "summary": one_line,
-        "caption_telegram": cap_tg,
-        "caption_instagram": cap_ig,
+        **outputs,
         "status": "ready",
         "processed_at": datetime.now(timezone.utc),
-        "ai_mode": mode,
+        "ai_mode": _ai_mode(errors),
+        "ai_pending": sorted(errors),
+        "needs_regen": bool(errors),
+        "tokens_in": usage["input_tokens"],
+        "tokens_out": usage["output_tokens"],
+        **_RELEASE_LEASE,
     }
 
-    if gemini_error:
-        update_data["gemini_error"] = gemini_error
+    if errors:
+        update_data["gemini_error"] = "; ".join(f"{k}: {v}" for k, v in errors.items())
+
+    if writer is not None:
+        writer.update(doc_ref, update_data)
+    else:
+        doc_ref.update(update_data)
+
+
+# -------------------------
+# Write-behind status updates
+# -------------------------
+
+# Flush queued "ready"/"error" updates every N docs or N seconds.
+STATUS_BATCH_SIZE = int(os.getenv("PROCESSOR_WRITE_BATCH", "20"))
+STATUS_FLUSH_SECONDS = float(os.getenv("PROCESSOR_FLUSH_SECONDS", "10"))
+
+
+class StatusWriter:
+    """
+    Collects per-doc updates from the worker threads and commits them in
+    WriteBatches, so N processed docs cost about N / batch_size write RPCs.
+
+    Use as a context manager: while inside it a background thread flushes
+    the queue once it is flush_seconds old, even if no further update
+    arrives (e.g. during slow Gemini backoff), and whatever is still queued
+    is flushed on exit, including on errors. A batch is atomic, so if its commit fails the
+    updates are retried one by one and only the docs that still fail are
+    reported (and listed in `failed`).
+    """
+
+    def __init__(self, client, batch_size=STATUS_BATCH_SIZE, flush_seconds=STATUS_FLUSH_SECONDS):
+        self.client = client
+        self.batch_size = max(1, batch_size)
+        self.flush_seconds = flush_seconds
+        self.written = 0
+        self.failed = []
+        self._pending = []
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._closed = threading.Event()
+        self._timer = None
+
+    def _due(self) -> bool:
+        return (len(self._pending) >= self.batch_size
+                or time.monotonic() - self._last_flush >= self.flush_seconds)
+
+    def update(self, doc_ref, data: dict):
+        with self._lock:
+            self._pending.append((doc_ref, data))
+            updates = self._take() if self._due() else None
+        if updates:
+            self._commit(updates)
+
+    def flush(self, only_if_due=False):
+        with self._lock:
+            if only_if_due and not (self._pending and self._due()):
+                return
+            updates = self._take()
+        if updates:
+            self._commit(updates)
+
+    def _flush_periodically(self):
+        # Wake often enough that nothing waits much longer than flush_seconds.
+        interval = min(1.0, self.flush_seconds)
+        while not self._closed.wait(interval):
+            self.flush(only_if_due=True)
+
+    def _take(self):
+        self._last_flush = time.monotonic()
+        updates, self._pending = self._pending, []
+        return updates
+
+    def _commit(self, updates):
+        batch = self.client.batch()
+        for doc_ref, data in updates:
+            batch.update(doc_ref, data)
+        try:
+            batch.commit()
+            self._count(len(updates), [])
+            return
+        except Exception:
+            pass
+
+        written = 0
+        failed = []
+        for doc_ref, data in updates:
+            try:
+                doc_ref.update(data)
+                written += 1
+            except Exception as e:
+                print(f"Status update failed for {doc_ref.id}: {e}")
+                failed.append(doc_ref.id)
+        self._count(written, failed)
+
+    def _count(self, written, failed):
+        with self._lock:
+            self.written += written
+            self.failed.extend(failed)
 
-    doc_ref.update(update_data)
+    def __enter__(self):
+        if self.flush_seconds > 0:
+            self._timer = threading.Thread(target=self._flush_periodically, daemon=True)
+            self._timer.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._closed.set()
+        if self._timer is not None:
+            self._timer.join()
+        self.flush()
+        print(f"Status updates: written {self.written}, failed {len(self.failed)}.")
+        return False
+
+
+# -------------------------
+# Lease-based claiming
+# -------------------------
+
+# Identifies this processor instance in "lease_owner".
+WORKER_ID = os.getenv("WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}"
+# A claimed doc stays ours for this long; after that another worker may take it.
+LEASE_SECONDS = float(os.getenv("PROCESSOR_LEASE_SECONDS", "600"))
+
+_RELEASE_LEASE = {
+    "lease_owner": firestore.DELETE_FIELD,
+    "lease_expires_at": firestore.DELETE_FIELD,
+}
+
+
+def _claimable(data: dict, now) -> bool:
+    status = data.get("status")
+    if status == "raw":
+        return True
+    # A worker that died mid-doc leaves it "processing"; reclaim once expired.
+    expires = data.get("lease_expires_at")
+    return status == "processing" and (expires is None or expires < now)
+
+
+def claim_doc(client, doc_ref):
+    """
+    Atomically move one doc raw -> processing under this worker's lease.
+
+    Returns the doc data if we got it, or None if it is already done or
+    another worker holds a live lease. Runs in a transaction, so of several
+    workers racing for the same doc exactly one wins.
+    """
+
+    @firestore.transactional
+    def claim(transaction):
+        snap = doc_ref.get(transaction=transaction)
+        now = datetime.now(timezone.utc)
+        if not snap.exists or not _claimable(snap.to_dict(), now):
+            return None
+        transaction.update(doc_ref, {
+            "status": "processing",
+            "lease_owner": WORKER_ID,
+            "lease_expires_at": now + timedelta(seconds=LEASE_SECONDS),
+        })
+        return snap.to_dict()
+
+    return claim(client.transaction())
+
+
+_RELEASE_REGEN_LEASE = {
+    "regen_lease_owner": firestore.DELETE_FIELD,
+    "regen_lease_expires_at": firestore.DELETE_FIELD,
+}
+
+
+def _fresh(data: dict, since) -> bool:
+    # Processed or regenerated at/after `since`, i.e. it just failed.
+    last = data.get("regenerated_at") or data.get("processed_at")
+    return since is not None and last is not None and last >= since
+
+
+def claim_regen(client, doc_ref, fresh_since=None):
+    """
+    Like claim_doc, for the regeneration pass: take a "ready" doc that still
+    needs_regen under a regen lease, so two workers never regenerate the
+    same outputs. Docs whose outputs fell back at/after `fresh_since` are
+    left for a later run. Returns the doc data, or None if it is not ours
+    to take.
+    """
+
+    @firestore.transactional
+    def claim(transaction):
+        snap = doc_ref.get(transaction=transaction)
+        now = datetime.now(timezone.utc)
+        if not snap.exists:
+            return None
+        data = snap.to_dict()
+        expires = data.get("regen_lease_expires_at")
+        if not data.get("needs_regen") or (expires is not None and expires >= now):
+            return None
+        if _fresh(data, fresh_since):
+            return None
+        transaction.update(doc_ref, {
+            "regen_lease_owner": WORKER_ID,
+            "regen_lease_expires_at": now + timedelta(seconds=LEASE_SECONDS),
+        })
+        return data
+
+    return claim(client.transaction())
+
+
+# Backlog paging: docs per query page, and max docs taken per run (0 = all).
+PAGE_SIZE = int(os.getenv("PROCESSOR_PAGE_SIZE", "50"))
+MAX_ITEMS_PER_RUN = int(os.getenv("PROCESSOR_MAX_ITEMS", "200"))
+# Wall-clock budget of one run (0 = none). The cron fires every 15 minutes and
+# at the default GEMINI_RPM=10 the item budget alone can take ~20, so no new
+# doc is claimed after this many seconds; it stays raw for the next run.
+RUN_SECONDS = float(os.getenv("PROCESSOR_RUN_SECONDS", "600"))
+
+# Enough to pick candidates; claim_doc reads the full doc anyway.
+_CANDIDATE_FIELDS = ["status", "published_at", "lease_expires_at"]
+
+
+def _status_query(col, status, page_size, newest_first=True):
+    query = col.where(filter=FieldFilter("status", "==", status))
+    if newest_first:
+        query = query.order_by("published_at", direction=firestore.Query.DESCENDING)
+    else:
+        # Served by the built-in single-field index.
+        query = query.order_by(firestore.FieldPath.document_id())
+    return query.select(_CANDIDATE_FIELDS).limit(page_size)
+
+
+def _iter_status(col, status, page_size=PAGE_SIZE):
+    """
+    Docs with `status`, newest published_at first, one short query per page.
+
+    Cursor pagination instead of one long stream: each page is fetched and
+    closed before its docs are processed, so a big backlog never holds a
+    stream open across minutes of LLM calls. Newest-first needs the
+    composite index in firestore.indexes.json (status ASC, published_at
+    DESC); without it we page in document-id order instead of failing.
+    """
+    query = _status_query(col, status, page_size)
+    last = None
+    while True:
+        try:
+            page = list((query.start_after(last) if last else query).stream())
+        except FailedPrecondition as e:
+            if last is not None:
+                raise
+            print(f"No (status, published_at) index, paging '{status}' docs unordered: {e}")
+            query = _status_query(col, status, page_size, newest_first=False)
+            page = list(query.stream())
+        yield from page
+        if len(page) < page_size:
+            return
+        last = page[-1]
+
+
+def _past(deadline) -> bool:
+    return deadline is not None and time.monotonic() >= deadline
+
+
+def iter_candidates(col, budget=MAX_ITEMS_PER_RUN, deadline=None):
+    """
+    Raw docs, then "processing" docs whose lease has expired, up to `budget`
+    docs and until time.monotonic() reaches `deadline`.
+    """
+    now = datetime.now(timezone.utc)
+
+    def candidates():
+        yield from _iter_status(col, "raw")
+        # A worker that died left these behind; only expired leases qualify.
+        for doc in _iter_status(col, "processing"):
+            if _claimable(doc.to_dict(), now):
+                yield doc
+
+    for n, doc in enumerate(candidates()):
+        if (budget and n >= budget) or _past(deadline):
+            return
+        yield doc
+
+
+# -------------------------
+# Regeneration of missing outputs
+# -------------------------
+
+# Docs with fallback outputs retried per run, and attempts before giving up.
+REGEN_MAX_ITEMS = int(os.getenv("PROCESSOR_REGEN_MAX_ITEMS", "20"))
+REGEN_MAX_ATTEMPTS = int(os.getenv("PROCESSOR_REGEN_MAX_ATTEMPTS", "3"))
+
+
+def regenerate_one_doc(doc_ref, data: dict, writer=None):
+    """Re-request only the outputs listed in `ai_pending`; keep the rest."""
+    pending = [f for f in data.get("ai_pending") or [] if f in OUTPUT_FIELDS]
+    with track_usage() as usage:
+        outputs, errors = generate_outputs(data, pending)
+    attempts = (data.get("regen_attempts") or 0) + 1
+
+    update_data = {
+        **outputs,
+        "ai_mode": _ai_mode(errors),
+        "ai_pending": sorted(errors),
+        "needs_regen": bool(errors) and attempts < REGEN_MAX_ATTEMPTS,
+        "regen_attempts": attempts,
+        "tokens_in": firestore.Increment(usage["input_tokens"]),
+        "tokens_out": firestore.Increment(usage["output_tokens"]),
+        "regenerated_at": datetime.now(timezone.utc),
+        "gemini_error": (
+            "; ".join(f"{k}: {v}" for k, v in errors.items())
+            if errors else firestore.DELETE_FIELD
+        ),
+        **_RELEASE_REGEN_LEASE,
+    }
+
+    if writer is not None:
+        writer.update(doc_ref, update_data)
+    else:
+        doc_ref.update(update_data)
+    return not errors
+
+
+def regenerate_pending(client, col, writer=None, budget=REGEN_MAX_ITEMS, fresh_since=None,
+                       deadline=None) -> int:
+    """
+    Later pass over "ready" docs that still carry fallback outputs. Each doc
+    is claimed (claim_regen) first, so overlapping workers split the work.
+    Docs that fell back at/after `fresh_since` (i.e. in this run) are not
+    retried yet, and the pass stops as soon as the Gemini quota runs out
+    or `deadline` (time.monotonic()) passes.
+    """
+    if budget <= 0 or quota_exhausted():
+        return 0
+    docs = (
+        col.where(filter=FieldFilter("needs_regen", "==", True))
+        .select(["needs_regen"])
+        .limit(budget)
+        .stream()
+    )
+    done = 0
+    for doc in docs:
+        if quota_exhausted():
+            print("Gemini quota exhausted, stopping regeneration.")
+            break
+        if _past(deadline):
+            print("Run deadline reached, stopping regeneration.")
+            break
+        try:
+            data = claim_regen(client, doc.reference, fresh_since)
+            if data is not None:
+                done += regenerate_one_doc(doc.reference, data, writer)
+        except Exception as e:
+            print(f"Regeneration failed for {doc.id}: {e}")
+    return done
 
 
 # -------------------------
 # Main runner
 # -------------------------
 
+# Docs processed in parallel. Gemini pacing (RPM/TPM, 429 backoff) lives in
+# gemini_summarizer, so this only bounds how many docs are in flight.
+PROCESSOR_CONCURRENCY = int(os.getenv("PROCESSOR_CONCURRENCY", "4"))
+
+
+def _process_safely(client, doc, writer=None) -> bool:
+    if quota_exhausted():
+        # Leave it raw for the next run rather than storing fallbacks.
+        return False
+    try:
+        data = claim_doc(client, doc.reference)
+    except Exception as e:
+        print(f"Could not claim {doc.id}: {e}")
+        return False
+    if data is None:
+        # Someone else has it (or already finished it)
+        return False
+
+    try:
+        process_one_doc(doc.reference, data, writer)
+        return True
+    except Exception as e:
+        # mark as error so it doesn't block forever
+        error_data = {
+            "status": "error",
+            "processing_error": str(e),
+            "processed_at": datetime.now(timezone.utc),
+            **_RELEASE_LEASE,
+        }
+        if writer is not None:
+            writer.update(doc.reference, error_data)
+        else:
+            doc.reference.update(error_data)
+        return False
+
+
+def _process_all(client, docs, writer=None) -> int:
+    """
+    Process `docs` on PROCESSOR_CONCURRENCY threads. The next doc is pulled
+    from the iterator only once a worker is free, so iter_candidates'
+    budget and deadline apply when a doc is claimed, not all up front.
+    Returns how many docs were processed.
+    """
+    workers = max(1, PROCESSOR_CONCURRENCY)
+    slots = threading.BoundedSemaphore(workers)
+    docs = iter(docs)
+    futures = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while True:
+            slots.acquire()
+            doc = next(docs, None)
+            if doc is None:
+                break
+            future = pool.submit(_process_safely, client, doc, writer)
+            future.add_done_callback(lambda _: slots.release())
+            futures.append(future)
+    return sum(future.result() for future in futures)
+
+
 def main():
     client = get_firestore_client()
     col = client.collection("news_items")
+    started = datetime.now(timezone.utc)
+    deadline = time.monotonic() + RUN_SECONDS if RUN_SECONDS > 0 else None
 
-    # Get items that are still raw (new Firestore style)
-    docs = col.where(
-        filter=FieldFilter("status", "==", "raw")
-    ).stream()
-    count = 0
-    for doc in docs:
-        data = doc.to_dict()
-        try:
-            process_one_doc(doc.reference, data)
-            count += 1
-        except Exception as e:
-            # mark as error so it doesn't block forever
-            doc.reference.update({
-                "status": "error",
-                "processing_error": str(e),
-                "processed_at": datetime.now(timezone.utc),
-            })
-
-    print(f"Processed {count} items.")
+    # Raw (or abandoned) docs, newest first and bounded per run by count and
+    # time; each is claimed before processing, so several processor
+    # instances can run at once without doing the same doc twice.
+    docs = iter_candidates(col, deadline=deadline)
+
+    # Pool exits (all docs done) before the writer's final flush.
+    with StatusWriter(client) as writer:
+        count = _process_all(client, docs, writer)
+
+        # Then retry outputs that fell back in earlier runs (not this one),
+        # unless the quota already ran out.
+        regenerated = regenerate_pending(client, col, writer, fresh_since=started, deadline=deadline)
+
+    print(f"Processed {count} items as {WORKER_ID}.")
+    if quota_exhausted():
+        print("Gemini quota exhausted: remaining docs were left for the next run.")
+    print(f"Regenerated missing outputs for {regenerated} items.")
+
+    cache = get_cache()
+    if cache is not None:
+        stats = cache.stats()
+        print(f"Gemini cache: {stats['hits']} hits, {stats['misses']} misses, "
+              f"{stats['entries']} entries ({stats['bytes']} bytes).")
 
 
 if __name__ == "__main__":
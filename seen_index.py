@@ -0,0 +1,74 @@
+# seen_index.py
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+# -------------------------
+# Tunables (ENV overridable)
+# -------------------------
+INDEX_PATH = Path(os.getenv("FEED_POSTER_CACHE_DIR", ".cache")) / "seen_index.sqlite3"
+# Forget entries after this long, so a doc deleted from Firestore can come back.
+TTL_SECONDS = float(os.getenv("SEEN_INDEX_TTL_DAYS", "30")) * 86400
+
+# Stay well under SQLite's bound-parameter limit.
+_CHUNK = 500
+
+
+class SeenIndex:
+    """
+    Local record of uids/URLs known to exist in Firestore 'news_items', or
+    deliberately left out of it (older than MAX_ITEM_AGE_HOURS).
+
+    Restored between runs through the cache directory. A hit means the doc
+    needs no further work (it was seen before), so no Firestore read or
+    article fetch is needed; a miss only means "probably new" and still
+    gets an authoritative check. Safe to share between threads.
+    """
+
+    def __init__(self, path: Path = INDEX_PATH, ttl: float = TTL_SECONDS):
+        self.path = Path(path)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS seen (uid TEXT PRIMARY KEY, url TEXT, seen_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS seen_url ON seen (url)")
+            self._conn.execute("DELETE FROM seen WHERE seen_at < ?", (time.time() - self.ttl,))
+
+    def _lookup(self, column: str, values) -> set:
+        values = list(dict.fromkeys(v for v in values if v))
+        found = set()
+        with self._lock:
+            for i in range(0, len(values), _CHUNK):
+                chunk = values[i:i + _CHUNK]
+                marks = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT {column} FROM seen WHERE {column} IN ({marks})", chunk
+                )
+                found.update(row[0] for row in rows)
+        return found
+
+    def known_uids(self, uids) -> set:
+        return self._lookup("uid", uids)
+
+    def known_urls(self, urls) -> set:
+        return self._lookup("url", urls)
+
+    def add(self, entries):
+        """Record (uid, url) pairs as existing in Firestore."""
+        now = time.time()
+        rows = [(uid, url, now) for uid, url in entries if uid]
+        if not rows:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO seen VALUES (?, ?, ?)", rows)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
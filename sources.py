@@ -0,0 +1,185 @@
+# sources.py
+from dataclasses import dataclass
+from typing import Optional
+
+import html_parse
+import metadata
+import newspaper_scrap
+from html_parse import strainer
+from http_cache import code_version
+from newspaper_scrap import (
+    SCRAPE_CONCURRENCY,
+    SCRAPE_DELAY,
+    ArticleSelectors,
+    CardSelectors,
+    iter_articles,
+    scrape_article,
+    scrape_cards,
+    ds_extract_author_and_date,
+)
+
+# Tags stored scraper output in the HTTP cache: editing any parsing code or
+# selector below invalidates what earlier runs stored, even for pages that
+# still answer 304.
+PARSER_VERSION = code_version(__file__, newspaper_scrap.__file__, html_parse.__file__, metadata.__file__)
+
+
+@dataclass(frozen=True)
+class SourceSpec:
+    """
+    Everything the collector needs to know about one scraped site.
+
+    `cards` says where the listing page's cards and their fields are,
+    `article` where an article page's fields are when its <head> doesn't
+    declare them. The generic engine (iter_source) does the
+    fetching, HTTP + parsed-output caching, partial parsing, dedup,
+    concurrency and politeness for every registered source, so a new site is
+    just a new entry in SOURCES.
+    """
+    name: str                                  # "source" field downstream
+    label: str                                 # short name for logs
+    category_url: str
+    cards: CardSelectors
+    article: ArticleSelectors
+    # Card field to use as summary when the article has no short_description.
+    summary_fallback: Optional[str] = None
+    # Per-host politeness for article fetches.
+    concurrency: int = SCRAPE_CONCURRENCY
+    delay: float = SCRAPE_DELAY
+
+    def scrape_cards(self):
+        return scrape_cards(self.category_url, self.cards, PARSER_VERSION)
+
+    def scrape_article(self, url: str):
+        return scrape_article(url, self.article, PARSER_VERSION)
+
+
+BARTAMAN_CATEGORY_URL = "https://bartamanpatrika.com/category/binodon"
+DS_CATEGORY_URL = "https://www.dainikstatesmannews.com/binodan/"
+EISAMAY_ENT_CATEGORY_URL = "https://eisamay.com/entertainment"
+
+SOURCES = [
+    SourceSpec(
+        name="Bartaman Binodon",
+        label="Bartaman",
+        category_url=BARTAMAN_CATEGORY_URL,
+        cards=CardSelectors(
+            card="div.col-md-4 > div.sg-post",
+            link=(".entry-content.catepage-grid a",),
+            title=(".entry-content.catepage-grid a",),
+            image=(".entry-header.catepage-img img",),
+            image_attrs=("data-original", "src"),
+            extra=(("category", (".category ul.global-list li a",)),),
+            parse_only=strainer("div", class_="col-md-4"),
+            text_modes=(("title", "joined"), ("category", "joined")),
+        ),
+        article=ArticleSelectors(
+            # The body block is the p-4 entry-content, not the shortdes one.
+            body=(
+                "div.entry-content.p-4:not(.shortdes) div.paragraph",
+                "div.entry-content.p-4:not(.shortdes)",
+                "div.entry-content:not(.shortdes)",
+                "div.entry-content",
+            ),
+            body_parse_only=strainer("div", class_="entry-content"),
+            body_fallback_to_page=False,
+            summary=("div.entry-content.shortdes p",),
+            title=("h3.entry-title.articletitle", "h1", "h2", "h3"),
+            image=(".entry-header .entry-thumbnail img", ".entry-thumbnail img"),
+            image_attrs=("data-original", "src"),
+            author=(".post-author .text h3",),
+            date=(".post-author .text h6",),
+            text_modes=(("title", "joined"), ("author", "joined"), ("date", "joined")),
+        ),
+    ),
+    SourceSpec(
+        name="Dainik Statesman Binodan",
+        label="Dainik Statesman",
+        category_url=DS_CATEGORY_URL,
+        cards=CardSelectors(
+            card="div.col-md-4 div.post-block-style",
+            link=(".post-content h3.post-title a",),
+            title=(".post-content h3.post-title a",),
+            image=(".post-thumb img",),
+            extra=(
+                ("author", (".post-meta .post-author",)),
+                ("read_time", (".post-meta .post-date",)),
+            ),
+            parse_only=strainer("div", class_="col-md-4"),
+            text_modes=(("title", "joined"), ("author", "plain")),
+        ),
+        article=ArticleSelectors(
+            body=("article div.entry-content", "article", "div.entry-content"),
+            body_parse_only=strainer("article"),
+            title=("h1.entry-title", "h1.post-title", "h1", "title"),
+            image=("article .post-thumb img", ".single-post-thumb img", "img.wp-post-image"),
+            # No author/date markup: read them off the "Published:" byline.
+            byline=ds_extract_author_and_date,
+            text_modes=(("title", "joined"),),
+        ),
+    ),
+    SourceSpec(
+        name="Eisamay Entertainment",
+        label="Eisamay",
+        category_url=EISAMAY_ENT_CATEGORY_URL,
+        cards=CardSelectors(
+            card='[data-test-id="story-card"]',
+            link=('[data-test-id="arr--hero-image"]', "a[href]"),
+            # h2 for the lead story, h6 for the others
+            title=(
+                '[data-test-id="headline"] h2',
+                '[data-test-id="headline"] h6',
+                '[data-test-id="headline"]',
+            ),
+            image=('[data-test-id="arr--hero-image"] img',),
+            image_attrs=("src", "data-src"),
+            extra=(("listing_subheadline", ('[data-test-id="subheadline"]',)),),
+            parse_only=strainer(attrs={"data-test-id": "story-card"}),
+        ),
+        article=ArticleSelectors(
+            body=("[data-test-id='article-body']", "div.article-body", "article"),
+            body_parse_only=strainer(attrs={"data-test-id": "article-body"}),
+            title=("h1.headline-m_headline__3_NhV", "h1", "title"),
+            image=("[data-test-id='arr--hero-image'] img", "figure img.qt-image", "img"),
+            image_attrs=("src", "data-src"),
+            author=("[data-test-id='author-name']", ".author-name", ".author"),
+            date=("time", "[data-test-id='timestamp']", "span.time", "span.date"),
+        ),
+        summary_fallback="listing_subheadline",
+    ),
+]
+
+
+def iter_source(spec: SourceSpec, known_urls=None):
+    """
+    Listing page -> article pages for one registered source, yielding each
+    {**card, "article_details": ...} as soon as it is scraped; see
+    newspaper_scrap.iter_articles for `known_urls`.
+    """
+    yield from iter_articles(
+        spec.scrape_cards(),
+        spec.scrape_article,
+        spec.label,
+        known_urls,
+        concurrency=spec.concurrency,
+        delay=spec.delay,
+    )
+
+
+# ==============================
+#  DEMO / TEST
+# ==============================
+if __name__ == "__main__":
+    for spec in SOURCES:
+        print(f"\n>>> {spec.name}")
+        for item in list(iter_source(spec))[:3]:
+            print("=" * 80)
+            print("CARD TITLE:", item["title"])
+            print("ARTICLE URL:", item["article_url"])
+            det = item["article_details"]
+            if det:
+                print("ARTICLE TITLE:", det["article_title"])
+                print("AUTHOR:", det["author"])
+                print("DATE:", det["date"])
+                print("SHORT DESC:", det["short_description"])
+                print("FULL TEXT :", det["full_text"] or "")
@@ -0,0 +1,137 @@
+# test_near_dup.py
+"""
+Hand-labelled story pairs for near_dup's thresholds.
+
+Each STORIES entry is one story as written by different sites (title,
+body lead); every pair across entries is a different story. Runs under
+pytest, or as a script to print the scores when re-calibrating.
+"""
+import itertools
+import tempfile
+from pathlib import Path
+
+import near_dup
+
+# story id -> versions as (title, body lead)
+STORIES = {
+    "raghu_first_look": [
+        ("দেবের নতুন ছবি 'রঘু ডাকাত' মুক্তি পাচ্ছে পুজোয়, প্রকাশ্যে এল ফার্স্ট লুক",
+         "পুজোর মরসুমে বড় পর্দায় আসছে দেব অভিনীত রঘু ডাকাত। পরিচালক ধ্রুব বন্দ্যোপাধ্যায় সোমবার ছবির প্রথম ঝলক প্রকাশ করেছেন। ছবিতে দেবের সঙ্গে রয়েছেন সোহিনী সরকার ও অনির্বাণ ভট্টাচার্য।"),
+        ("পুজোয় মুক্তি পাচ্ছে দেবের 'রঘু ডাকাত', প্রকাশ্যে ফার্স্ট লুক",
+         "সোমবার সামনে এল রঘু ডাকাতের ফার্স্ট লুক। ধ্রুব বন্দ্যোপাধ্যায়ের এই ছবিতে নাম ভূমিকায় দেব। অনির্বাণ ভট্টাচার্য ও সোহিনী সরকারও রয়েছেন। পুজোতেই মুক্তি।"),
+        ("রঘু ডাকাতের ফার্স্ট লুকে চমক দেবের",
+         "দেব অভিনীত রঘু ডাকাত ছবির প্রথম ঝলক সোমবার প্রকাশ্যে এনেছেন পরিচালক ধ্রুব বন্দ্যোপাধ্যায়। সোহিনী সরকার, অনির্বাণ ভট্টাচার্য রয়েছেন ছবিতে।"),
+    ],
+    "srabanti_london": [
+        ("শ্রাবন্তীর নতুন ছবির শুটিং শুরু লন্ডনে",
+         "লন্ডনে শুরু হল শ্রাবন্তী চট্টোপাধ্যায়ের নতুন ছবির শুটিং। পরিচালক রাজ চক্রবর্তী জানিয়েছেন এক মাস ধরে চলবে কাজ।"),
+        ("লন্ডনে শুটিং শুরু করলেন শ্রাবন্তী, নতুন ছবিতে চমক",
+         "রাজ চক্রবর্তীর পরিচালনায় নতুন ছবির কাজ শুরু করলেন শ্রাবন্তী চট্টোপাধ্যায়। লন্ডনে টানা এক মাস শুটিং।"),
+    ],
+    "mimi_jeet": [
+        ("নতুন ছবিতে জিতের সঙ্গে জুটি বাঁধছেন মিমি",
+         "দীর্ঘ বিরতির পর আবার বড় পর্দায় ফিরছেন মিমি চক্রবর্তী। জিতের বিপরীতে দেখা যাবে তাঁকে। ছবির পরিচালক রাজা চন্দ, শুটিং শুরু ডিসেম্বরে।"),
+        ("জিৎ-মিমি জুটি ফিরছে বড় পর্দায়",
+         "রাজা চন্দের নতুন ছবিতে জুটি বাঁধছেন জিৎ ও মিমি চক্রবর্তী। ডিসেম্বরে শুরু শুটিং। দীর্ঘ দিন পর বড় পর্দায় মিমি।"),
+    ],
+    "pushpa_1000": [
+        ("Box office: Pushpa 2 crosses 1000 crore",
+         "Allu Arjun's Pushpa 2 has crossed the 1000 crore mark worldwide in its first week, the makers said on Sunday. The Sukumar film also stars Rashmika Mandanna."),
+        ("Pushpa 2 enters 1000 crore club in a week",
+         "Sukumar's Pushpa 2, starring Allu Arjun and Rashmika Mandanna, crossed 1000 crore worldwide within a week of release, according to the makers."),
+    ],
+    "stree_500": [
+        ("Box office: Stree 2 crosses 500 crore",
+         "Shraddha Kapoor and Rajkummar Rao's horror comedy Stree 2 has earned 500 crore at the domestic box office, trade analysts said. Amar Kaushik directed the film."),
+    ],
+    "raghu_box_office": [
+        ("বক্স অফিসে ঝড় তুলল 'রঘু ডাকাত', প্রথম সপ্তাহে আয় ১০ কোটি",
+         "প্রথম সপ্তাহেই ১০ কোটি টাকা আয় করল দেব অভিনীত রঘু ডাকাত। হলে হলে ভিড়, জানাল প্রযোজনা সংস্থা।"),
+    ],
+    "khadaan_box_office": [
+        ("বক্স অফিসে ঝড় তুলল 'খাদান', প্রথম সপ্তাহে আয় ৮ কোটি",
+         "সুজিত দত্তের খাদান প্রথম সপ্তাহে আট কোটি টাকার ব্যবসা করেছে। দেব ও জিশু সেনগুপ্ত অভিনীত ছবিটি দর্শক টানছে।"),
+    ],
+    "raghu_song": [
+        ("রঘু ডাকাতের প্রথম গান প্রকাশ্যে, দেবের নাচে মুগ্ধ ভক্তরা",
+         "বুধবার প্রকাশ পেল রঘু ডাকাত ছবির প্রথম গান। দেবের নাচ দেখে উচ্ছ্বসিত ভক্তরা। গানটি গেয়েছেন অরিজিৎ সিং, সুর দিয়েছেন ইন্দ্রদীপ দাশগুপ্ত।"),
+    ],
+    "pushpa_day5": [
+        ("Pushpa 2 box office collection day 5",
+         "Pushpa 2 collected 65 crore on its fifth day in India, taking its domestic total past 590 crore, according to early trade estimates."),
+    ],
+    "pushpa_day6": [
+        ("Pushpa 2 box office collection day 6",
+         "On day 6, Pushpa 2 earned about 52 crore in India as weekday numbers dipped, with the domestic total now near 645 crore, trade trackers said."),
+    ],
+    "dev_birthday": [
+        ("দেবের জন্মদিনে বিশেষ চমক ভক্তদের জন্য",
+         "জন্মদিনে ভক্তদের জন্য নতুন গান প্রকাশ করলেন দেব। সামাজিক মাধ্যমে তা ভাইরাল।"),
+    ],
+    "jeet_trailer": [
+        ("পুজোয় মুক্তি পাচ্ছে জিতের নতুন ছবি, প্রকাশ্যে এল ট্রেলার",
+         "জিৎ অভিনীত নতুন ছবির ট্রেলার প্রকাশ্যে। পরিচালক রাজা চন্দ। পুজোয় মুক্তি।"),
+    ],
+    "srabanti_prosenjit": [
+        ("শ্রাবন্তীর নতুন ছবির ঘোষণা, থাকছেন প্রসেনজিৎ",
+         "শ্রাবন্তী চট্টোপাধ্যায় ও প্রসেনজিৎ চট্টোপাধ্যায় জুটি বাঁধছেন নতুন ছবিতে। পরিচালনায় অরিন্দম শীল।"),
+    ],
+    "mimi_web_series": [
+        ("নতুন ওয়েব সিরিজে মিমি, প্রকাশ্যে এল টিজার",
+         "একটি ওটিটি প্ল্যাটফর্মের নতুন ওয়েব সিরিজে গোয়েন্দার ভূমিকায় মিমি চক্রবর্তী। বুধবার টিজার প্রকাশ পেয়েছে।"),
+    ],
+}
+
+# Same-story pairs we accept missing: rewritten so heavily that catching them
+# would let different stories through too (a miss only costs a second post).
+KNOWN_MISSES = {("mimi_jeet", 0, 1)}
+
+
+def _pairs():
+    items = [(sid, i, near_dup.signature(title, body))
+             for sid, versions in STORIES.items()
+             for i, (title, body) in enumerate(versions)]
+    for (sid_a, i_a, sig_a), (sid_b, i_b, sig_b) in itertools.combinations(items, 2):
+        yield (sid_a, i_a), (sid_b, i_b), sig_a, sig_b
+
+
+def test_labelled_pairs():
+    for (sid_a, i_a), (sid_b, i_b), sig_a, sig_b in _pairs():
+        flagged = near_dup.is_near_duplicate(sig_a, sig_b)
+        if sid_a != sid_b:
+            assert not flagged, f"different stories flagged: {sid_a}[{i_a}] / {sid_b}[{i_b}]"
+        elif (sid_a, i_a, i_b) not in KNOWN_MISSES:
+            assert flagged, f"same story missed: {sid_a}[{i_a}] / {sid_b}[{i_b}]"
+
+
+def test_title_only():
+    # No body on one side: only an identical title counts.
+    title, body = STORIES["raghu_first_look"][0]
+    assert near_dup.is_near_duplicate(near_dup.signature(title, body), near_dup.signature(title))
+    day5, day6 = STORIES["pushpa_day5"][0][0], STORIES["pushpa_day6"][0][0]
+    assert not near_dup.is_near_duplicate(near_dup.signature(day5), near_dup.signature(day6))
+
+
+def test_index_finds_representative():
+    with tempfile.TemporaryDirectory() as tmp:
+        index = near_dup.NearDupIndex(Path(tmp) / "index.json")
+        for sid, versions in STORIES.items():
+            first = near_dup.signature(*versions[0])
+            assert index.find(f"{sid}-0", first) is None
+            index.add(f"{sid}-0", first)
+        index.save()
+
+        index = near_dup.NearDupIndex(Path(tmp) / "index.json")
+        for sid, versions in STORIES.items():
+            for i, version in enumerate(versions[1:], start=1):
+                expected = None if (sid, 0, i) in KNOWN_MISSES else f"{sid}-0"
+                assert index.find(f"{sid}-{i}", near_dup.signature(*version)) == expected
+
+
+if __name__ == "__main__":
+    for (sid_a, i_a), (sid_b, i_b), sig_a, sig_b in _pairs():
+        title = near_dup.similarity(sig_a["title"], sig_b["title"])
+        body = near_dup.similarity(sig_a["body"], sig_b["body"])
+        label = "SAME" if sid_a == sid_b else "diff"
+        flag = "dup" if near_dup.is_near_duplicate(sig_a, sig_b) else ""
+        print(f"{label} title {title:.2f} body {body:.2f} {flag:3} {sid_a}[{i_a}] / {sid_b}[{i_b}]")
@@ -0,0 +1,61 @@
+# text_store.py
+import gzip
+import hashlib
+import os
+import time
+from pathlib import Path
+
+# -------------------------
+# Tunables (ENV overridable)
+# -------------------------
+# Where article full_text goes:
+#   inline – in the Firestore doc (default, as before)
+#   blob   – gzip blob under the cache dir, doc keeps only "full_text_ref"
+#   none   – dropped; only the content hash is kept
+MODE = os.getenv("FULL_TEXT_STORAGE", "inline").strip().lower()
+STORE_DIR = Path(os.getenv("FEED_POSTER_CACHE_DIR", ".cache")) / "text"
+TTL_SECONDS = float(os.getenv("TEXT_STORE_TTL_DAYS", "14")) * 86400
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+def _blob_path(ref: str, root: Path = STORE_DIR) -> Path:
+    return root / ref[:2] / f"{ref}.txt.gz"
+
+
+def put(text: str, root: Path = STORE_DIR) -> str:
+    """Store `text` content-addressed; returns its ref (sha256). Idempotent."""
+    ref = text_hash(text)
+    path = _blob_path(ref, root)
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(gzip.compress(text.encode("utf-8"), compresslevel=6))
+        os.replace(tmp, path)
+    return ref
+
+
+def get(ref: str, root: Path = STORE_DIR):
+    """Text stored under `ref`, or None if it is missing (e.g. pruned)."""
+    if not ref:
+        return None
+    try:
+        return gzip.decompress(_blob_path(ref, root).read_bytes()).decode("utf-8")
+    except (OSError, EOFError):
+        return None
+
+
+def prune(root: Path = STORE_DIR, ttl: float = TTL_SECONDS) -> int:
+    """Delete blobs not written for `ttl` seconds. Returns how many went."""
+    cutoff = time.time() - ttl
+    removed = 0
+    for path in root.glob("*/*.txt.gz"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except OSError:
+            pass
+    return removed